@@ -0,0 +1,111 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class ActivityTracker:
+    """
+    Non-blocking recorder for the user_activity log.
+    Routes enqueue events in memory; a background writer drains the queue and
+    inserts them in batches, so logging never adds a database round-trip.
+    """
+
+    def __init__(self, db, writer_db=None, max_queue_size=10000, batch_size=200, flush_interval=1.0):
+        self.db = db
+        # The writer thread gets its own connection so it never shares a cursor with requests
+        self.writer_db = writer_db or db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        # record() runs on request threads while the writer updates the same counters
+        self._count_lock = threading.Lock()
+
+    def record(self, user_id, activity_type, activity_data=None):
+        """Enqueue an activity event; drops it (and counts the drop) when the queue is full"""
+        if self._writer is None or not self._writer.is_alive():
+            self._start_writer()
+        try:
+            self.queue.put_nowait((user_id, activity_type, activity_data, datetime.now()))
+            return True
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+
+    def _count(self, written=0, dropped=0):
+        with self._count_lock:
+            self.written += written
+            self.dropped += dropped
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+                self._writer.start()
+
+    def _next_batch(self):
+        """Block until one event arrives, then collect more until the batch is full or the interval ends"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write(batch)
+            except Exception as e:
+                # A bad event must not kill the writer; the batch is lost but counted
+                print(f"Activity writer error: {e}")
+                self._count(dropped=len(batch))
+
+    def _write(self, batch):
+        rows = [
+            (user_id, activity_type, json.dumps(data) if data is not None else None, timestamp)
+            for user_id, activity_type, data, timestamp in batch
+        ]
+        result = self.writer_db.execute_many(
+            "INSERT INTO user_activity (user_id, activity_type, activity_data, timestamp) VALUES (%s, %s, %s, %s)",
+            rows
+        )
+        if result is None:
+            self._count(dropped=len(rows))
+        else:
+            self._count(written=len(rows))
+
+    def get_activity_counts(self, user_id, since=None):
+        """Per-type activity counts for a user, aggregated in the database"""
+        if since is None:
+            rows = self.db.execute_query(
+                "SELECT activity_type, COUNT(*) AS count FROM user_activity WHERE user_id = %s GROUP BY activity_type",
+                (user_id,),
+                user_id=user_id
+            )
+        else:
+            rows = self.db.execute_query(
+                "SELECT activity_type, COUNT(*) AS count FROM user_activity WHERE user_id = %s AND timestamp >= %s GROUP BY activity_type",
+                (user_id, since),
+                user_id=user_id
+            )
+        return {row['activity_type']: row['count'] for row in rows or []}
+
+    def stats(self):
+        with self._count_lock:
+            return {
+                'queued': self.queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped
+            }
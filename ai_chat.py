@@ -4,6 +4,9 @@ from textblob import TextBlob
 import json
 import random
 from datetime import datetime
+from response_catalog import ResponseCatalog
+
+RESPONSES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'responses.json')
 
 class MentalHealthAI:
     """
@@ -11,11 +14,14 @@ class MentalHealthAI:
     Provides empathetic responses, crisis detection, and therapeutic techniques
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, responses=None):
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if self.api_key:
             openai.api_key = self.api_key
         
+        # Crisis and fallback replies, loaded once from responses.json
+        self.responses = responses or ResponseCatalog.load(RESPONSES_PATH, 'mental_health_ai')
+        
         self.crisis_keywords = [
             'suicide', 'kill myself', 'end it all', 'hurt myself', 'self harm',
             'want to die', 'better off dead', 'no point living', 'end my life'
@@ -115,23 +121,9 @@ class MentalHealthAI:
             'keywords': detected_keywords
         }
     
-    def get_crisis_response(self):
+    def get_crisis_response(self, language=None):
         """Provide immediate crisis intervention response"""
-        return """🚨 I'm very concerned about what you're sharing. Your life has value and meaning.
-
-**IMMEDIATE HELP AVAILABLE:**
-🆘 Emergency: 911
-📞 National Suicide Prevention Lifeline: 988
-📱 Crisis Text Line: Text HOME to 741741
-🌐 Online Chat: suicidepreventionlifeline.org
-
-**Remember:**
-• You are not alone in this
-• These feelings can change with proper support
-• Many people who felt this way found help and hope
-• Professional counselors are trained to help with exactly what you're experiencing
-
-Please reach out to one of these resources right now. They're available 24/7 and want to help you."""
+        return self.responses.select('crisis', language=language)
     
     def categorize_mental_health_concern(self, text):
         """Categorize the type of mental health concern"""
@@ -174,7 +166,7 @@ Please reach out to one of these resources right now. They're available 24/7 and
         suggested_technique = technique_mapping.get(primary_concern, 'grounding')
         return self.therapeutic_techniques[suggested_technique]
     
-    def generate_personalized_response(self, user_message, user_history=None):
+    def generate_personalized_response(self, user_message, user_history=None, language=None):
         """Generate personalized AI response based on user input and history"""
         
         # Analyze the message
@@ -185,7 +177,7 @@ Please reach out to one of these resources right now. They're available 24/7 and
         # Handle crisis situations immediately
         if crisis_detection['is_crisis']:
             return {
-                'response': self.get_crisis_response(),
+                'response': self.get_crisis_response(language),
                 'analysis': {
                     'sentiment': sentiment_analysis,
                     'crisis': crisis_detection,
@@ -214,7 +206,7 @@ Please reach out to one of these resources right now. They're available 24/7 and
                 print(f"OpenAI API error: {e}")
         
         # Fallback to rule-based responses
-        fallback_response = self.get_fallback_response(user_message, sentiment_analysis, categories)
+        fallback_response = self.get_fallback_response(user_message, sentiment_analysis, categories, language)
         
         return {
             'response': fallback_response,
@@ -272,101 +264,14 @@ Respond as a caring mental health companion would."""
             print(f"OpenAI API error: {e}")
             return None
     
-    def get_fallback_response(self, user_message, sentiment_analysis, categories):
+    def get_fallback_response(self, user_message, sentiment_analysis, categories, language=None):
         """Generate rule-based response when AI service is unavailable"""
-        user_message_lower = user_message.lower()
-        sentiment = sentiment_analysis['sentiment']
-        
-        # Anxiety-focused responses
-        if 'anxiety' in categories:
-            responses = [
-                """I can hear the anxiety in your message, and I want you to know that what you're feeling is valid. Anxiety can be overwhelming, but there are ways to manage it.
-
-🌬️ Try this right now: Take a slow, deep breath in for 4 counts, hold it for 4, then exhale for 6. This can help activate your body's relaxation response.
-
-What specific situation or thought is contributing most to your anxiety right now?""",
-                
-                """Anxiety has a way of making everything feel urgent and overwhelming. You're not alone in feeling this way, and it's okay to take things one moment at a time.
-
-🧘 Here's a grounding technique: Look around and name 5 things you can see, 4 things you can touch, 3 things you can hear, 2 things you can smell, and 1 thing you can taste.
-
-Remember, anxiety is temporary. What usually helps you feel more grounded?"""
-            ]
-            return random.choice(responses)
-        
-        # Depression-focused responses
-        elif 'depression' in categories:
-            responses = [
-                """I hear the heaviness in your words, and I want you to know that reaching out here shows incredible strength. Depression can make everything feel dark, but you don't have to face this alone.
-
-💙 Your feelings are valid, and it's okay to not be okay right now. Even small steps forward count as progress.
-
-What's one tiny thing that used to bring you even a moment of comfort? Sometimes reconnecting with small joys can be a starting point.""",
-                
-                """Thank you for sharing something so difficult with me. Depression can make it feel like there's no way forward, but please know that these feelings can change with proper support.
-
-🌱 You matter, and your life has value even when it doesn't feel that way. Consider reaching out to a mental health professional who can provide the support you deserve.
-
-Is there anyone in your life you feel comfortable talking to about how you're feeling?"""
-            ]
-            return random.choice(responses)
+        for category in ('anxiety', 'depression', 'stress'):
+            if category in categories:
+                return self.responses.select(category, language=language)
         
-        # Stress-focused responses
-        elif 'stress' in categories:
-            responses = [
-                """It sounds like you're carrying a heavy load right now. Stress can feel overwhelming, but acknowledging it like you just did is an important first step.
-
-💪 Remember: You don't have to handle everything at once. It's okay to prioritize and take breaks.
-
-What's the biggest source of stress for you right now? Sometimes talking through it can help us see new perspectives.""",
-                
-                """I can sense the pressure you're under. Stress affects all of us, and it's completely normal to feel overwhelmed sometimes.
-
-🌿 Try this: Take 5 minutes to step away from whatever is stressing you. Focus only on your breathing. This isn't avoiding the problem—it's giving your mind space to reset.
-
-What would feel most helpful to you right now—talking through the situation or learning some stress management techniques?"""
-            ]
-            return random.choice(responses)
-        
-        # Positive sentiment responses
-        elif sentiment in ['positive', 'very_positive']:
-            responses = [
-                """I'm so glad to hear some positivity in your message! It's wonderful when we can find moments of joy or accomplishment, especially when we're working on our mental health.
-
-✨ Celebrating these positive moments, no matter how small, is so important. They remind us that good feelings are possible and worth working toward.
-
-What's been going well for you lately? I'd love to hear more about what's bringing you joy.""",
-                
-                """Your positive energy comes through in your message, and it's beautiful to witness! These moments of lightness are precious and worth acknowledging.
-
-🌟 How does it feel to experience this positivity? Sometimes reflecting on what contributes to our good moments can help us cultivate more of them.
-
-What would you like to focus on to maintain this positive momentum?"""
-            ]
-            return random.choice(responses)
-        
-        # General supportive responses
-        else:
-            responses = [
-                """Thank you for reaching out and sharing with me. I'm here to listen and support you through whatever you're experiencing.
-
-🤗 It takes courage to talk about our mental health, and I want you to know that your thoughts and feelings matter.
-
-What's on your mind today? Whether it's something specific or just a general feeling, I'm here to help however I can.""",
-                
-                """I appreciate you taking the time to connect here. Mental health is so important, and it's wonderful that you're being proactive about your wellbeing.
-
-💭 Remember that it's completely normal to have ups and downs. Every day is a new opportunity for growth, healing, and self-compassion.
-
-How are you feeling right now, and what kind of support would be most helpful to you today?""",
-                
-                """Hello! I'm glad you're here. Whether you're having a good day or a challenging one, this is a safe space to share whatever is on your mind.
-
-🌈 Your mental health journey is unique to you, and there's no right or wrong way to feel. I'm here to provide support, encouragement, and practical strategies.
-
-What would you like to talk about today? I'm listening with care and without judgment."""
-            ]
-            return random.choice(responses)
+        sentiment = 'positive' if sentiment_analysis['sentiment'] in ['positive', 'very_positive'] else 'any'
+        return self.responses.select('general', sentiment, language)
 
 # Example usage and testing
 if __name__ == "__main__":
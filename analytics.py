@@ -0,0 +1,204 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+# Spacing between users in the combined (user_id, day) sort key. Days are counted
+# from the epoch (~20k today), so a window start can never reach the previous user.
+DAY_SPAN = 1 << 20
+
+
+class CohortAnalytics:
+    """
+    Batch mood analytics for every user at once.
+    mood_entries is streamed in id-ordered chunks into NumPy arrays, and all
+    metrics are computed in vectorized passes over one (user_id, day) series
+    instead of looping per user. Results land in mood_daily_summary.
+    """
+
+    def __init__(self, db, chunk_size=50000, write_batch_size=5000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.write_batch_size = write_batch_size
+
+    def load_entries(self):
+        """Stream mood_entries with keyset pagination and return (user_ids, days, scores)"""
+        user_chunks, day_chunks, score_chunks = [], [], []
+        last_id = 0
+
+        while True:
+            # A NULL timestamp would become NaT and corrupt the (user_id, day) keys, so those rows are skipped
+            rows = self.db.execute_query(
+                "SELECT id, user_id, mood_score, timestamp FROM mood_entries "
+                "WHERE id > %s AND timestamp IS NOT NULL ORDER BY id LIMIT %s",
+                (last_id, self.chunk_size)
+            )
+            if not rows:
+                break
+
+            user_chunks.append(np.fromiter((row['user_id'] for row in rows), dtype=np.int64, count=len(rows)))
+            score_chunks.append(np.fromiter((row['mood_score'] for row in rows), dtype=np.int64, count=len(rows)))
+            day_chunks.append(np.array([row['timestamp'] for row in rows], dtype='datetime64[D]'))
+            last_id = rows[-1]['id']
+
+            if len(rows) < self.chunk_size:
+                break
+
+        if not user_chunks:
+            empty = np.array([], dtype=np.int64)
+            return empty, np.array([], dtype='datetime64[D]'), empty
+
+        return np.concatenate(user_chunks), np.concatenate(day_chunks), np.concatenate(score_chunks)
+
+    @staticmethod
+    def _window_sums(keys, prefix, days):
+        """Sum over the trailing `days` calendar days (inclusive) for each sorted key"""
+        start = np.searchsorted(keys, keys - (days - 1), side='left')
+        end = np.arange(1, len(keys) + 1)
+        return prefix[end] - prefix[start]
+
+    @staticmethod
+    def _prefix(values):
+        return np.concatenate(([0], np.cumsum(values, dtype=np.float64)))
+
+    def compute(self, user_ids, days, scores):
+        """Compute per user-day metrics; returns a dict of equally sized arrays"""
+        day_numbers = days.astype(np.int64)
+        entry_keys = user_ids * DAY_SPAN + day_numbers
+
+        # Collapse entries into one sorted row per (user_id, day)
+        keys, inverse = np.unique(entry_keys, return_inverse=True)
+        n = len(keys)
+        entries = np.bincount(inverse, minlength=n)
+        score_sum = np.bincount(inverse, weights=scores, minlength=n)
+        distribution = np.bincount(inverse * 5 + (scores - 1), minlength=n * 5).reshape(n, 5)
+        daily_mean = score_sum / entries
+
+        # Rolling entry-weighted means over calendar windows
+        sum_prefix = self._prefix(score_sum)
+        count_prefix = self._prefix(entries)
+        sum_7 = self._window_sums(keys, sum_prefix, 7)
+        count_7 = self._window_sums(keys, count_prefix, 7)
+        sum_14 = self._window_sums(keys, sum_prefix, 14)
+        count_14 = self._window_sums(keys, count_prefix, 14)
+        sum_30 = self._window_sums(keys, sum_prefix, 30)
+        count_30 = self._window_sums(keys, count_prefix, 30)
+
+        rolling_7 = sum_7 / count_7
+        rolling_30 = sum_30 / count_30
+
+        # Week-over-week: last 7 days against the 7 days before them
+        prev_count = count_14 - count_7
+        with np.errstate(invalid='ignore', divide='ignore'):
+            prev_7 = (sum_14 - sum_7) / prev_count
+        wow_delta = np.where(prev_count > 0, rolling_7 - prev_7, np.nan)
+
+        # Volatility: standard deviation of daily means over the last 30 days
+        mean_prefix = self._prefix(daily_mean)
+        square_prefix = self._prefix(daily_mean ** 2)
+        active_days = self._window_sums(keys, self._prefix(np.ones(n)), 30)
+        window_mean = self._window_sums(keys, mean_prefix, 30) / active_days
+        window_square = self._window_sums(keys, square_prefix, 30) / active_days
+        volatility_30 = np.sqrt(np.maximum(window_square - window_mean ** 2, 0))
+
+        # Streaks: consecutive logged days, restarting at gaps and user boundaries
+        positions = np.arange(n)
+        breaks = np.ones(n, dtype=bool)
+        breaks[1:] = np.diff(keys) != 1
+        run_start = np.maximum.accumulate(np.where(breaks, positions, 0))
+        streak = positions - run_start + 1
+
+        return {
+            'user_id': keys // DAY_SPAN,
+            'day': (keys % DAY_SPAN).astype('datetime64[D]'),
+            'entries': entries,
+            'avg_mood': daily_mean,
+            'distribution': distribution,
+            'rolling_7_avg': rolling_7,
+            'rolling_30_avg': rolling_30,
+            'volatility_30': volatility_30,
+            'streak_days': streak,
+            'wow_delta': wow_delta
+        }
+
+    def write_summary(self, metrics, since=None):
+        """Upsert metrics into mood_daily_summary, optionally only days on or after `since`"""
+        selected = np.arange(len(metrics['user_id']))
+        if since is not None:
+            selected = np.flatnonzero(metrics['day'] >= np.datetime64(since, 'D'))
+
+        wow = metrics['wow_delta']
+        rows = [
+            (
+                int(metrics['user_id'][i]),
+                metrics['day'][i].item(),
+                int(metrics['entries'][i]),
+                round(float(metrics['avg_mood'][i]), 2),
+                *(int(count) for count in metrics['distribution'][i]),
+                round(float(metrics['rolling_7_avg'][i]), 2),
+                round(float(metrics['rolling_30_avg'][i]), 2),
+                round(float(metrics['volatility_30'][i]), 3),
+                int(metrics['streak_days'][i]),
+                None if np.isnan(wow[i]) else round(float(wow[i]), 2)
+            )
+            for i in selected
+        ]
+
+        query = """
+            INSERT INTO mood_daily_summary (user_id, day, entries, avg_mood, score_1, score_2, score_3, score_4, score_5,
+                rolling_7_avg, rolling_30_avg, volatility_30, streak_days, wow_delta)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE entries = VALUES(entries), avg_mood = VALUES(avg_mood),
+                score_1 = VALUES(score_1), score_2 = VALUES(score_2), score_3 = VALUES(score_3),
+                score_4 = VALUES(score_4), score_5 = VALUES(score_5),
+                rolling_7_avg = VALUES(rolling_7_avg), rolling_30_avg = VALUES(rolling_30_avg),
+                volatility_30 = VALUES(volatility_30), streak_days = VALUES(streak_days), wow_delta = VALUES(wow_delta)
+        """
+
+        written = 0
+        for offset in range(0, len(rows), self.write_batch_size):
+            batch = rows[offset:offset + self.write_batch_size]
+            if self.db.execute_many(query, batch) is None:
+                return None
+            written += len(batch)
+        return written
+
+    def run(self, since=None):
+        """Full batch: load, compute and write; returns a small report"""
+        started = time.perf_counter()
+        user_ids, days, scores = self.load_entries()
+        loaded = time.perf_counter()
+
+        if len(user_ids) == 0:
+            return {'entries': 0, 'user_days': 0, 'written': 0}
+
+        metrics = self.compute(user_ids, days, scores)
+        computed = time.perf_counter()
+        written = self.write_summary(metrics, since)
+
+        return {
+            'entries': len(user_ids),
+            'users': len(np.unique(metrics['user_id'])),
+            'user_days': len(metrics['user_id']),
+            'written': written,
+            'load_seconds': round(loaded - started, 3),
+            'compute_seconds': round(computed - loaded, 3),
+            'write_seconds': round(time.perf_counter() - computed, 3)
+        }
+
+
+def main():
+    """Run the cohort analytics batch, rewriting the last 30 days of summaries"""
+    from app import background_database
+    from sharding import partitions
+
+    # Every metric is per user and a user's rows live on one shard, so each shard runs on its own
+    for db in partitions(background_database()):
+        analytics = CohortAnalytics(db)
+        report = analytics.run(since=datetime.now().date() - timedelta(days=30))
+        print(f"Cohort analytics complete: {report}")
+
+
+if __name__ == "__main__":
+    main()
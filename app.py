@@ -1,23 +1,67 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
-import mysql.connector
-from mysql.connector import Error
+import asyncio
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 import jwt
 from functools import wraps
 import openai
 from textblob import TextBlob
 import json
+from resources import ResourceCatalog
+from activity import ActivityTracker
+from reminders import ReminderScheduler, FileReminderSink, WebhookReminderSink
+from idempotency import IdempotencyStore, DatabaseIdempotencyBackend, RedisIdempotencyBackend
+from rate_limit import RateLimiter, SharedBucketBackend
+from replication import ReplicatedDatabase
+from storage import create_backend
+from statements import StatementRegistry
+from http_cache import ResponseCompressor, StaticAssets, IMMUTABLE_CACHE_CONTROL
+from response_catalog import ResponseCatalog, UserLanguages
+from sharding import ShardMap, ShardedDatabase, parse_shard_hosts, shard_id_space
+from shared_state import current_shared_state
+from dashboard import DashboardSnapshots
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
 CORS(app)
 
+# gzip/brotli for JSON and HTML responses above 1 KB
+ResponseCompressor(min_size=1024).init_app(app)
+
+# Frontend assets are read once and served under content-hashed URLs; the page is rendered once
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+static_assets = StaticAssets(BASE_DIR, ['style.css', 'script.js'])
+index_page = static_assets.render_page(app, 'index.html')
+
+# Reverse proxies in front of the app (1 behind nginx). Their X-Forwarded-For entry becomes
+# request.remote_addr, so per-IP limits see clients instead of the proxy. Keep 0 when clients
+# connect directly, since they could forge the header. Under uvicorn use --forwarded-allow-ips.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
+
+# Node-wide shared memory, installed by launcher.py before the app is imported (None otherwise)
+shared_state = current_shared_state()
+
+# Per-IP/per-user token buckets and load shedding for all /api/ routes
+rate_limiter = RateLimiter(
+    backend=SharedBucketBackend(shared_state.buckets) if shared_state else None,
+    enabled=os.getenv('RATE_LIMIT_ENABLED', '1') != '0',
+    counters=shared_state.counters if shared_state else None
+)
+rate_limiter.init_app(app)
+
 # OpenAI API configuration (replace with your API key)
 openai.api_key = os.getenv('OPENAI_API_KEY', 'your-openai-api-key-here')
 
+# Benchmarks only: replace the OpenAI call with a fixed delay plus the fallback reply
+LLM_SIMULATED_LATENCY_MS = float(os.getenv('LLM_SIMULATED_LATENCY_MS', '0'))
+
 # MySQL Database configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -26,46 +70,266 @@ DB_CONFIG = {
     'password': 'your-mysql-password'
 }
 
+# Storage backend: 'mysql' (default) or 'sqlite' for local development, tests and benchmarks
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'wellmind.db')
+
+# Per-statement timing; slower calls are logged with their EXPLAIN plan
+statements = StatementRegistry(slow_query_ms=float(os.getenv('SLOW_QUERY_MS', '200')))
+
+# Read replicas as comma-separated host[:port] entries, e.g. "127.0.0.1:3307,127.0.0.1:3308".
+# They share the primary's database name and credentials (MySQL backend only).
+DB_REPLICA_HOSTS = os.getenv('DB_REPLICA_HOSTS', '') if DB_BACKEND == 'mysql' else ''
+DB_REPLICA_CONFIGS = []
+for replica in filter(None, DB_REPLICA_HOSTS.split(',')):
+    host, _, port = replica.strip().partition(':')
+    DB_REPLICA_CONFIGS.append(dict(DB_CONFIG, host=host, port=int(port or 3306)))
+
+# Per-user shards as comma-separated name=host[:port] entries, e.g. "shard0=127.0.0.1:3311,shard1=127.0.0.1:3312".
+# The primary keeps the global tables and the user directory; see sharding.py (MySQL backend only).
+# A shard's position in the list picks its id space, so new shards are appended and never reordered.
+DB_SHARDS = os.getenv('DB_SHARDS', '') if DB_BACKEND == 'mysql' else ''
+DB_SHARD_CONFIGS = {
+    name: dict(DB_CONFIG, host=host, port=port, session=shard_id_space(index))
+    for index, (name, (host, port)) in enumerate(parse_shard_hosts(DB_SHARDS).items())
+}
+shard_map = ShardMap(list(DB_SHARD_CONFIGS)) if DB_SHARD_CONFIGS else None
+
 class DatabaseManager:
-    def __init__(self):
-        self.connection = None
+    """
+    Runs statements against one database. Connections and prepared cursors
+    are kept per thread, so request threads, the ASGI thread pool and
+    background workers never share a cursor or a connection.
+    """
+    
+    def __init__(self, config=None, backend=None, registry=None):
+        self.config = config or DB_CONFIG
+        self.backend = backend or create_backend(DB_BACKEND, self.config, SQLITE_PATH)
+        self.statements = registry or statements
+        self._local = threading.local()
+        self._generation = 0
+        # Every thread's open connection, so disconnect() can close them all
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+    
+    def _thread_state(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            # First use on this thread, or disconnect() closed every thread's connection
+            local.generation = self._generation
+            local.connection = None
+            local.prepared = {}
+        return local
+    
+    @property
+    def connection(self):
+        return self._thread_state().connection
     
     def connect(self):
+        local = self._thread_state()
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            return self.connection
-        except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            # Prepared cursors belong to the old connection
+            local.prepared = {}
+            local.connection = self.backend.connect()
+            self._track(local.connection)
+            return local.connection
+        except self.backend.errors as e:
+            print(f"Error connecting to {self.backend.name} database: {e}")
             return None
     
+    def _track(self, connection):
+        with self._connections_lock:
+            # Threads that exited never call disconnect(); close what they left behind
+            finished = [thread for thread in self._connections if not thread.is_alive()]
+            stale = [self._connections.pop(thread) for thread in finished]
+            previous = self._connections.get(threading.current_thread())
+            if previous is not None and previous is not connection:
+                stale.append(previous)
+            self._connections[threading.current_thread()] = connection
+        for old in stale:
+            self._close(old)
+    
+    def _close(self, connection):
+        try:
+            if self.backend.is_connected(connection):
+                connection.close()
+        except self.backend.errors as e:
+            print(f"Error closing {self.backend.name} connection: {e}")
+    
     def disconnect(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Close every thread's connection; each thread reconnects on its next query"""
+        with self._connections_lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._generation += 1
+        for connection in connections:
+            self._close(connection)
     
     def execute_query(self, query, params=None):
+        return self._execute(self.statements.for_sql(query), params)
+    
+    def execute_statement(self, name, params=None):
+        """Run a statement registered by name in the statement registry"""
+        return self._execute(self.statements.get(name), params)
+    
+    def _cursor_for(self, local, statement):
+        if not statement.preparable:
+            return self.backend.cursor(local.connection, dictionary=True), True
+        cursor = local.prepared.get(statement.name)
+        if cursor is None:
+            cursor = local.prepared[statement.name] = self.backend.prepared_cursor(local.connection)
+        return cursor, False
+    
+    def _explain(self, statement, params):
+        try:
+            cursor = self.backend.cursor(self.connection, dictionary=True)
+            explain_sql = self.backend.translate(self.backend.explain_prefix + statement.sql)
+            if params is None:
+                cursor.execute(explain_sql)
+            else:
+                cursor.execute(explain_sql, params)
+            plan = self.backend.fetchall(cursor)
+            cursor.close()
+            return plan
+        except self.backend.errors as e:
+            return f"EXPLAIN failed: {e}"
+    
+    def _execute(self, statement, params):
+        started = time.perf_counter()
+        rows = 0
+        local = self._thread_state()
         try:
-            if not self.connection or not self.connection.is_connected():
+            if not self.backend.is_connected(local.connection):
                 self.connect()
             
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params)
+            cursor, temporary = self._cursor_for(local, statement)
+            if params is None:
+                cursor.execute(self.backend.translate(statement.sql))
+            else:
+                cursor.execute(self.backend.translate(statement.sql), params)
             
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
+            if statement.is_read:
+                result = self.backend.fetchall(cursor)
+                rows = len(result)
             else:
-                self.connection.commit()
+                local.connection.commit()
                 result = cursor.lastrowid
+                rows = cursor.rowcount
+            
+            if temporary:
+                cursor.close()
+        except self.backend.errors as e:
+            local.prepared.pop(statement.name, None)
+            self.statements.record(statement, time.perf_counter() - started, 0, failed=True)
+            print(f"Database error: {e}")
+            return None
+        
+        elapsed = time.perf_counter() - started
+        if self.statements.record(statement, elapsed, max(rows, 0)):
+            print(f"Slow query ({elapsed * 1000:.1f} ms) {statement.name}: {self._explain(statement, params)}")
+        return result
+    
+    def execute_many(self, query, params_list):
+        local = self._thread_state()
+        try:
+            if not self.backend.is_connected(local.connection):
+                self.connect()
+            
+            cursor = self.backend.cursor(local.connection, dictionary=False)
+            cursor.executemany(self.backend.translate(query), params_list)
+            local.connection.commit()
+            result = cursor.rowcount
             
             cursor.close()
             return result
-        except Error as e:
+        except self.backend.errors as e:
             print(f"Database error: {e}")
             return None
 
-db = DatabaseManager()
+# Named statements for the request hot path, parsed and prepared once
+statements.register('find_user_by_email_or_username', "SELECT id FROM users WHERE email = %s OR username = %s")
+statements.register('insert_user', "INSERT INTO users (username, email, password_hash, created_at) VALUES (%s, %s, %s, %s)")
+statements.register('find_user_by_email', "SELECT id, username, email, password_hash FROM users WHERE email = %s")
+statements.register('insert_mood_entry', "INSERT INTO mood_entries (user_id, mood_score, notes, timestamp) VALUES (%s, %s, %s, %s)")
+statements.register('mood_history', "SELECT mood_score, notes, timestamp FROM mood_entries WHERE user_id = %s AND timestamp >= %s ORDER BY timestamp ASC")
+statements.register('dashboard_mood_entries', "SELECT id, mood_score, notes, timestamp FROM mood_entries WHERE user_id = %s AND timestamp >= %s ORDER BY timestamp ASC")
+statements.register('recent_chat_messages', "SELECT message_type, content FROM chat_sessions WHERE user_id = %s ORDER BY timestamp DESC LIMIT 10")
+statements.register('insert_chat_message', "INSERT INTO chat_sessions (user_id, message_type, content, timestamp) VALUES (%s, %s, %s, %s)")
+statements.register('mood_stats_since', "SELECT AVG(mood_score) as avg_mood, COUNT(*) as total_entries FROM mood_entries WHERE user_id = %s AND timestamp >= %s")
+statements.register('mood_average_since', "SELECT AVG(mood_score) as avg_mood FROM mood_entries WHERE user_id = %s AND timestamp >= %s")
+statements.register('mood_average_between', "SELECT AVG(mood_score) as avg_mood FROM mood_entries WHERE user_id = %s AND timestamp BETWEEN %s AND %s")
+statements.register(
+    'upsert_preferences',
+    "INSERT INTO user_preferences (user_id, notification_enabled, reminder_time, theme, language) VALUES (%s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE notification_enabled = VALUES(notification_enabled), reminder_time = VALUES(reminder_time), "
+    "theme = VALUES(theme), language = VALUES(language)"
+)
+statements.register('user_language', "SELECT language FROM user_preferences WHERE user_id = %s")
+
+def shard_databases():
+    return {name: ReplicatedDatabase(DatabaseManager(config), recent_writes=recent_writes) for name, config in DB_SHARD_CONFIGS.items()}
+
+def background_database():
+    """Fresh primary-only connections for a background thread or tool, routed to shards like db"""
+    primary = ReplicatedDatabase(DatabaseManager())
+    if shard_map is None:
+        return primary
+    return ShardedDatabase(primary, shard_databases(), shard_map)
+
+# Writes go to the primary; reads go to a healthy replica unless the user just wrote (on any worker under launcher.py)
+recent_writes = shared_state.recent_writes if shared_state else None
+db = ReplicatedDatabase(
+    DatabaseManager(),
+    [DatabaseManager(config) for config in DB_REPLICA_CONFIGS],
+    recent_writes=recent_writes
+)
+if shard_map is not None:
+    # Per-user tables go to the user's shard; global tables stay on the replicated primary
+    db = ShardedDatabase(db, shard_databases(), shard_map)
+resource_catalog = ResourceCatalog(db)
+activity_tracker = ActivityTracker(db, writer_db=background_database())
+
+# Per-user dashboards precomputed on mood writes; version stamps are node-wide under launcher.py
+dashboards = DashboardSnapshots(
+    db,
+    writer_db=background_database(),
+    versions=shared_state.dashboard_versions if shared_state else None
+)
+
+# Reminder delivery: webhook in production, local file for development
+REMINDER_WEBHOOK_URL = os.getenv('REMINDER_WEBHOOK_URL')
+reminder_sink = WebhookReminderSink(REMINDER_WEBHOOK_URL) if REMINDER_WEBHOOK_URL else FileReminderSink()
+reminder_scheduler = ReminderScheduler(background_database(), reminder_sink)
+
+# Replays responses for client retries that carry an Idempotency-Key header. Keys are kept in a
+# bounded in-process store by default, so a replay touches neither MySQL nor OpenAI; with several
+# workers or nodes set IDEMPOTENCY_BACKEND=redis (IDEMPOTENCY_REDIS_URL) so a retry served by
+# another process still replays. IDEMPOTENCY_BACKEND=database uses the primary instead of Redis.
+IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory')
+if IDEMPOTENCY_BACKEND == 'redis':
+    idempotency_backend = RedisIdempotencyBackend(os.getenv('IDEMPOTENCY_REDIS_URL', 'redis://localhost:6379/0'))
+elif IDEMPOTENCY_BACKEND == 'database':
+    idempotency_backend = DatabaseIdempotencyBackend(db)
+else:
+    idempotency_backend = None
+idempotency = IdempotencyStore(idempotency_backend)
+
+# Canned replies for LLM outages, and each user's reply language
+response_catalog = ResponseCatalog.load(os.path.join(BASE_DIR, 'responses.json'), 'mindbot')
+user_languages = UserLanguages(db, versions=shared_state.preference_versions if shared_state else None)
 
 class AITherapist:
-    def __init__(self):
+    # Checked in order; the first category with a matching keyword picks the reply
+    FALLBACK_KEYWORDS = (
+        ('crisis', ('suicide', 'kill myself', 'end it all', 'hurt myself', 'self harm')),
+        ('anxiety', ('anxious', 'anxiety', 'stressed', 'panic', 'worried', 'overwhelmed')),
+        ('depression', ('depressed', 'sad', 'hopeless', 'empty', 'worthless', 'lonely'))
+    )
+    
+    def __init__(self, sentiment_cache=None, counters=None):
+        # Polarity per message text, shared by all workers when launched through launcher.py
+        self.sentiment_cache = sentiment_cache
+        self.counters = counters
         self.system_prompt = """
         You are MindBot, a compassionate AI mental health companion. Your role is to:
         1. Provide emotional support and active listening
@@ -80,11 +344,24 @@ class AITherapist:
         immediately encourage them to contact emergency services or a crisis hotline.
         """
     
+    def _polarity(self, text):
+        if self.sentiment_cache is None:
+            return TextBlob(text).sentiment.polarity
+        
+        polarity = self.sentiment_cache.get(text)
+        if polarity is not None:
+            self.counters.add('sentiment_hits')
+            return polarity
+        
+        polarity = TextBlob(text).sentiment.polarity
+        self.sentiment_cache.set(text, polarity)
+        self.counters.add('sentiment_misses')
+        return polarity
+    
     def analyze_sentiment(self, text):
         """Analyze sentiment of user message"""
         try:
-            blob = TextBlob(text)
-            sentiment = blob.sentiment.polarity
+            sentiment = self._polarity(text)
             
             if sentiment > 0.1:
                 return "positive"
@@ -95,21 +372,27 @@ class AITherapist:
         except:
             return "neutral"
     
-    def generate_response(self, user_message, conversation_history=None):
+    def _build_messages(self, user_message, conversation_history=None):
+        messages = [{"role": "system", "content": self.system_prompt}]
+        
+        # Add conversation history if available
+        if conversation_history:
+            for msg in conversation_history[-5:]:  # Last 5 messages for context
+                messages.append(msg)
+        
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def generate_response(self, user_message, conversation_history=None, language=None):
         """Generate AI response using OpenAI GPT"""
         try:
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            # Add conversation history if available
-            if conversation_history:
-                for msg in conversation_history[-5:]:  # Last 5 messages for context
-                    messages.append(msg)
-            
-            messages.append({"role": "user", "content": user_message})
+            if LLM_SIMULATED_LATENCY_MS:
+                time.sleep(LLM_SIMULATED_LATENCY_MS / 1000)
+                return self.get_fallback_response(self.analyze_sentiment(user_message), user_message, language)
             
             response = openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
-                messages=messages,
+                messages=self._build_messages(user_message, conversation_history),
                 max_tokens=200,
                 temperature=0.7
             )
@@ -120,64 +403,43 @@ class AITherapist:
             print(f"AI response error: {e}")
             # Fallback responses based on sentiment
             sentiment = self.analyze_sentiment(user_message)
-            return self.get_fallback_response(sentiment, user_message)
+            return self.get_fallback_response(sentiment, user_message, language)
     
-    def get_fallback_response(self, sentiment, user_message):
-        """Provide fallback responses when AI service is unavailable"""
-        user_message_lower = user_message.lower()
-        
-        # Crisis keywords
-        crisis_keywords = ['suicide', 'kill myself', 'end it all', 'hurt myself', 'self harm']
-        if any(keyword in user_message_lower for keyword in crisis_keywords):
-            return """I'm very concerned about what you're sharing. Please reach out for immediate help:
-            
-            🚨 Emergency: 911
-            📞 Crisis Text Line: Text HOME to 741741
-            📞 National Suicide Prevention Lifeline: 988
-            
-            You matter, and there are people who want to help you."""
-        
-        # Anxiety/stress keywords
-        anxiety_keywords = ['anxious', 'anxiety', 'stressed', 'panic', 'worried', 'overwhelmed']
-        if any(keyword in user_message_lower for keyword in anxiety_keywords):
-            return """I hear that you're feeling anxious or stressed. Here are some techniques that might help:
-            
-            🌬️ Try the 4-7-8 breathing technique: Breathe in for 4, hold for 7, exhale for 8
-            🧘 Practice grounding: Name 5 things you see, 4 you hear, 3 you touch, 2 you smell, 1 you taste
-            💪 Remember: This feeling is temporary and you have the strength to get through it
-            
-            What's been causing you the most stress lately?"""
-        
-        # Depression keywords
-        depression_keywords = ['depressed', 'sad', 'hopeless', 'empty', 'worthless', 'lonely']
-        if any(keyword in user_message_lower for keyword in depression_keywords):
-            return """I'm sorry you're going through such a difficult time. Your feelings are valid, and it's brave of you to reach out.
-            
-            💙 Remember: You are not alone in this
-            🌱 Small steps count - even getting through today is an achievement
-            🤝 Consider reaching out to a trusted friend, family member, or mental health professional
-            
-            What's one small thing that usually brings you even a tiny bit of comfort?"""
-        
-        # Positive sentiment
-        if sentiment == "positive":
-            return """I'm glad to hear some positivity in your message! It's wonderful when we can find moments of joy or accomplishment.
+    async def agenerate_response(self, user_message, conversation_history=None, language=None):
+        """Async variant of generate_response for the ASGI serving mode"""
+        try:
+            if LLM_SIMULATED_LATENCY_MS:
+                await asyncio.sleep(LLM_SIMULATED_LATENCY_MS / 1000)
+                return self.get_fallback_response(self.analyze_sentiment(user_message), user_message, language)
             
-            ✨ Celebrating these moments, big or small, is so important for our mental health
-            🌟 What's been going well for you lately?
+            response = await openai.ChatCompletion.acreate(
+                model="gpt-3.5-turbo",
+                messages=self._build_messages(user_message, conversation_history),
+                max_tokens=200,
+                temperature=0.7
+            )
             
-            How can I support you in maintaining this positive momentum?"""
+            return response.choices[0].message.content.strip()
         
-        # Neutral/general response
-        return """Thank you for sharing with me. I'm here to listen and support you through whatever you're experiencing.
+        except Exception as e:
+            print(f"AI response error: {e}")
+            sentiment = self.analyze_sentiment(user_message)
+            return self.get_fallback_response(sentiment, user_message, language)
+    
+    def get_fallback_response(self, sentiment, user_message, language=None):
+        """Provide fallback responses when AI service is unavailable"""
+        user_message_lower = user_message.lower()
         
-        🤗 Remember that it's okay to not be okay sometimes
-        💭 Your thoughts and feelings matter
-        🌈 Every day is a new opportunity for growth and healing
+        for category, keywords in self.FALLBACK_KEYWORDS:
+            if any(keyword in user_message_lower for keyword in keywords):
+                return response_catalog.select(category, language=language)
         
-        What's on your mind today? I'm here to help however I can."""
+        return response_catalog.select('general', sentiment, language)
 
-ai_therapist = AITherapist()
+ai_therapist = AITherapist(
+    sentiment_cache=shared_state.sentiment if shared_state else None,
+    counters=shared_state.counters if shared_state else None
+)
 
 def token_required(f):
     @wraps(f)
@@ -197,7 +459,15 @@ def token_required(f):
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # Revalidated on every visit so a new deploy's asset URLs are picked up immediately
+    return index_page.make_response('no-cache')
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    payload = static_assets.get(filename)
+    if payload is None:
+        return jsonify({'message': 'Not found'}), 404
+    return payload.make_response(IMMUTABLE_CACHE_CONTROL)
 
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -211,9 +481,10 @@ def register():
             return jsonify({'message': 'All fields are required'}), 400
         
         # Check if user already exists
-        existing_user = db.execute_query(
-            "SELECT id FROM users WHERE email = %s OR username = %s",
-            (email, username)
+        existing_user = db.execute_statement(
+            'find_user_by_email_or_username',
+            (email, username),
+            consistent=True
         )
         
         if existing_user:
@@ -221,8 +492,8 @@ def register():
         
         # Hash password and create user
         password_hash = generate_password_hash(password)
-        user_id = db.execute_query(
-            "INSERT INTO users (username, email, password_hash, created_at) VALUES (%s, %s, %s, %s)",
+        user_id = db.execute_statement(
+            'insert_user',
             (username, email, password_hash, datetime.now())
         )
         
@@ -246,9 +517,10 @@ def login():
             return jsonify({'message': 'Email and password are required'}), 400
         
         # Find user
-        user = db.execute_query(
-            "SELECT id, username, email, password_hash FROM users WHERE email = %s",
-            (email,)
+        user = db.execute_statement(
+            'find_user_by_email',
+            (email,),
+            consistent=True
         )
         
         if not user or not check_password_hash(user[0]['password_hash'], password):
@@ -275,6 +547,7 @@ def login():
         return jsonify({'message': 'Internal server error'}), 500
 
 @app.route('/api/mood', methods=['POST'])
+@idempotency.idempotent
 def save_mood():
     try:
         data = request.get_json()
@@ -285,12 +558,16 @@ def save_mood():
         if not mood_score or mood_score < 1 or mood_score > 5:
             return jsonify({'message': 'Valid mood score (1-5) is required'}), 400
         
-        mood_id = db.execute_query(
-            "INSERT INTO mood_entries (user_id, mood_score, notes, timestamp) VALUES (%s, %s, %s, %s)",
-            (user_id, mood_score, notes, datetime.now())
+        timestamp = datetime.now()
+        mood_id = db.execute_statement(
+            'insert_mood_entry',
+            (user_id, mood_score, notes, timestamp),
+            user_id=user_id
         )
         
         if mood_id:
+            dashboards.record(user_id, mood_id, mood_score, notes, timestamp)
+            activity_tracker.record(user_id, 'mood_entry', {'mood_id': mood_id, 'mood_score': mood_score})
             return jsonify({'message': 'Mood entry saved', 'mood_id': mood_id}), 201
         else:
             return jsonify({'message': 'Failed to save mood entry'}), 500
@@ -305,9 +582,10 @@ def get_mood_history(user_id):
         # Get last 30 days of mood entries
         thirty_days_ago = datetime.now() - timedelta(days=30)
         
-        mood_entries = db.execute_query(
-            "SELECT mood_score, notes, timestamp FROM mood_entries WHERE user_id = %s AND timestamp >= %s ORDER BY timestamp ASC",
-            (user_id, thirty_days_ago)
+        mood_entries = db.execute_statement(
+            'mood_history',
+            (user_id, thirty_days_ago),
+            user_id=user_id
         )
         
         return jsonify({'mood_entries': mood_entries or []}), 200
@@ -317,6 +595,7 @@ def get_mood_history(user_id):
         return jsonify({'message': 'Internal server error'}), 500
 
 @app.route('/api/chat', methods=['POST'])
+@idempotency.idempotent
 def chat_with_ai():
     try:
         data = request.get_json()
@@ -327,9 +606,10 @@ def chat_with_ai():
             return jsonify({'message': 'Message is required'}), 400
         
         # Get recent conversation history
-        conversation_history = db.execute_query(
-            "SELECT message_type, content FROM chat_sessions WHERE user_id = %s ORDER BY timestamp DESC LIMIT 10",
-            (user_id,)
+        conversation_history = db.execute_statement(
+            'recent_chat_messages',
+            (user_id,),
+            user_id=user_id
         )
         
         # Format history for AI
@@ -340,19 +620,23 @@ def chat_with_ai():
                 formatted_history.append({"role": role, "content": msg['content']})
         
         # Generate AI response
-        ai_response = ai_therapist.generate_response(user_message, formatted_history)
+        ai_response = ai_therapist.generate_response(user_message, formatted_history, user_languages.lookup(user_id))
         
         # Save conversation to database
-        db.execute_query(
-            "INSERT INTO chat_sessions (user_id, message_type, content, timestamp) VALUES (%s, %s, %s, %s)",
-            (user_id, 'user', user_message, datetime.now())
+        db.execute_statement(
+            'insert_chat_message',
+            (user_id, 'user', user_message, datetime.now()),
+            user_id=user_id
         )
         
-        db.execute_query(
-            "INSERT INTO chat_sessions (user_id, message_type, content, timestamp) VALUES (%s, %s, %s, %s)",
-            (user_id, 'bot', ai_response, datetime.now())
+        db.execute_statement(
+            'insert_chat_message',
+            (user_id, 'bot', ai_response, datetime.now()),
+            user_id=user_id
         )
         
+        activity_tracker.record(user_id, 'chat_message', {'message_length': len(user_message)})
+        
         return jsonify({'response': ai_response}), 200
         
     except Exception as e:
@@ -363,20 +647,23 @@ def chat_with_ai():
 def get_user_analytics(user_id):
     try:
         # Get mood analytics
-        mood_stats = db.execute_query(
-            "SELECT AVG(mood_score) as avg_mood, COUNT(*) as total_entries FROM mood_entries WHERE user_id = %s AND timestamp >= %s",
-            (user_id, datetime.now() - timedelta(days=30))
+        mood_stats = db.execute_statement(
+            'mood_stats_since',
+            (user_id, datetime.now() - timedelta(days=30)),
+            user_id=user_id
         )
         
         # Get mood trend (last 7 days vs previous 7 days)
-        last_week = db.execute_query(
-            "SELECT AVG(mood_score) as avg_mood FROM mood_entries WHERE user_id = %s AND timestamp >= %s",
-            (user_id, datetime.now() - timedelta(days=7))
+        last_week = db.execute_statement(
+            'mood_average_since',
+            (user_id, datetime.now() - timedelta(days=7)),
+            user_id=user_id
         )
         
-        prev_week = db.execute_query(
-            "SELECT AVG(mood_score) as avg_mood FROM mood_entries WHERE user_id = %s AND timestamp BETWEEN %s AND %s",
-            (user_id, datetime.now() - timedelta(days=14), datetime.now() - timedelta(days=7))
+        prev_week = db.execute_statement(
+            'mood_average_between',
+            (user_id, datetime.now() - timedelta(days=14), datetime.now() - timedelta(days=7)),
+            user_id=user_id
         )
         
         analytics = {
@@ -394,7 +681,99 @@ def get_user_analytics(user_id):
         print(f"Analytics error: {e}")
         return jsonify({'message': 'Internal server error'}), 500
 
+@app.route('/api/dashboard/<int:user_id>', methods=['GET'])
+def get_user_dashboard(user_id):
+    try:
+        # Mood series and analytics in one precomputed payload; rebuilt only when a write made it stale
+        payload = dashboards.load(user_id)
+        
+        if payload is None:
+            return jsonify({'message': 'Failed to load dashboard'}), 500
+        
+        return payload.make_response('private, no-cache')
+        
+    except Exception as e:
+        print(f"Dashboard error: {e}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@app.route('/api/activity/<int:user_id>', methods=['GET'])
+def get_user_activity(user_id):
+    try:
+        days = request.args.get('days', type=int)
+        since = datetime.now() - timedelta(days=days) if days else None
+        
+        return jsonify({
+            'user_id': user_id,
+            'activity_counts': activity_tracker.get_activity_counts(user_id, since)
+        }), 200
+        
+    except Exception as e:
+        print(f"Activity error: {e}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@app.route('/api/preferences', methods=['POST'])
+def save_preferences():
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id', 1)  # Default for demo
+        notification_enabled = bool(data.get('notification_enabled', True))
+        reminder_time = data.get('reminder_time', '09:00')
+        theme = data.get('theme', 'light')
+        language = data.get('language', 'en')
+        
+        try:
+            datetime.strptime(reminder_time, '%H:%M')
+        except (TypeError, ValueError):
+            return jsonify({'message': 'reminder_time must be HH:MM'}), 400
+        
+        result = db.execute_statement(
+            'upsert_preferences',
+            (user_id, notification_enabled, reminder_time, theme, language),
+            user_id=user_id
+        )
+        
+        if result is None:
+            return jsonify({'message': 'Failed to save preferences'}), 500
+        
+        # Move the user to their new reminder bucket without reloading the table. In other
+        # workers the scheduler is idle; the one running it picks the row up on its next sync
+        if reminder_scheduler.is_running():
+            reminder_scheduler.update_preference(user_id, notification_enabled, reminder_time)
+        user_languages.set(user_id, language)
+        
+        return jsonify({'message': 'Preferences saved'}), 200
+        
+    except Exception as e:
+        print(f"Preferences error: {e}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@app.route('/api/resources', methods=['GET'])
+def get_wellness_resources():
+    try:
+        category = request.args.get('category') or None
+        payload = resource_catalog.get(category)
+        
+        if payload is None:
+            if not resource_catalog.loaded:
+                # Never cache an empty catalog; the load is retried after a few seconds
+                response = jsonify({'message': 'Resources are temporarily unavailable'})
+                response.headers['Retry-After'] = str(resource_catalog.retry_interval)
+                return response, 503
+            return jsonify({'message': 'Unknown resource category'}), 404
+        
+        # Conditional GETs get a 304; the body is compressed once per encoding and reused
+        return payload.make_response(f'public, max-age={resource_catalog.ttl}')
+        
+    except Exception as e:
+        print(f"Resources error: {e}")
+        return jsonify({'message': 'Internal server error'}), 500
+
 if __name__ == '__main__':
     # Initialize database connection
     db.connect()
+    # With debug=True the reloader runs this file in a watcher process and a serving child;
+    # only the child (WERKZEUG_RUN_MAIN=true) runs the scheduler, so reminders go out once
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        reminder_scheduler.load()
+        reminder_scheduler.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
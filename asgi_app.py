@@ -0,0 +1,362 @@
+"""
+ASGI serving mode for Well Mind.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000 --workers 2
+
+The I/O-bound routes (/api/chat, /api/mood, /api/mood/<id>, /api/analytics/<id>, /api/dashboard/<id>)
+are served natively on the event loop with aiomysql and the async OpenAI client,
+so an in-flight chat costs a coroutine instead of a worker thread. Every other
+route, method and preflight request falls through to the Flask app unchanged.
+Responses keep the JSON contract script.js relies on. With DB_REPLICA_HOSTS,
+native reads go to replica pools with the same lag checks and read-your-writes
+stickiness as the Flask routes; with DB_SHARDS they run on the thread pool.
+
+Behind a reverse proxy, let uvicorn take the client address from
+X-Forwarded-For so per-IP rate limits see clients rather than the proxy:
+
+    uvicorn asgi_app:app --workers 2 --proxy-headers --forwarded-allow-ips=10.0.0.2
+
+--forwarded-allow-ips lists the proxy addresses to trust (uvicorn trusts only
+127.0.0.1 by default); leave TRUSTED_PROXY_HOPS unset in this mode.
+
+One worker per node runs the reminder scheduler: the first to take an flock
+on REMINDER_LOCK_PATH, with another taking over if it exits.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from a2wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from werkzeug.http import parse_accept_header, parse_etags
+
+import app as wsgi
+from async_storage import AioMySQLDatabase, AsyncReplicatedDatabase, ThreadedDatabase
+from http_cache import COMPRESSIBLE_MIMETYPES, compress, negotiate_encoding
+from rate_limit import identity_from
+
+
+class JSONResponse(Response):
+    """JSON encoded exactly like Flask's jsonify (compact, sorted keys, dates as HTTP dates)"""
+
+    media_type = 'application/json'
+
+    def render(self, content):
+        return wsgi.app.json.dumps(content, separators=(',', ':')).encode('utf-8')
+
+
+async def save_mood(request, data):
+    try:
+        user_id = data.get('user_id', 1)  # Default for demo
+        mood_score = data.get('mood_score')
+        notes = data.get('notes', '')
+
+        if not mood_score or mood_score < 1 or mood_score > 5:
+            return JSONResponse({'message': 'Valid mood score (1-5) is required'}, 400)
+
+        timestamp = datetime.now()
+        mood_id = await adb.execute_statement(
+            'insert_mood_entry',
+            (user_id, mood_score, notes, timestamp),
+            user_id=user_id
+        )
+
+        if mood_id:
+            wsgi.dashboards.record(user_id, mood_id, mood_score, notes, timestamp)
+            wsgi.activity_tracker.record(user_id, 'mood_entry', {'mood_id': mood_id, 'mood_score': mood_score})
+            return JSONResponse({'message': 'Mood entry saved', 'mood_id': mood_id}, 201)
+        return JSONResponse({'message': 'Failed to save mood entry'}, 500)
+
+    except Exception as e:
+        print(f"Mood save error: {e}")
+        return JSONResponse({'message': 'Internal server error'}, 500)
+
+
+async def get_mood_history(request, data, user_id):
+    try:
+        mood_entries = await adb.execute_statement(
+            'mood_history',
+            (user_id, datetime.now() - timedelta(days=30)),
+            user_id=user_id
+        )
+        return JSONResponse({'mood_entries': mood_entries or []}, 200)
+
+    except Exception as e:
+        print(f"Mood history error: {e}")
+        return JSONResponse({'message': 'Internal server error'}, 500)
+
+
+async def chat_with_ai(request, data):
+    try:
+        user_message = data.get('message')
+        user_id = data.get('user_id', 1)  # Default for demo
+
+        if not user_message:
+            return JSONResponse({'message': 'Message is required'}, 400)
+
+        conversation_history = await adb.execute_statement('recent_chat_messages', (user_id,), user_id=user_id)
+
+        formatted_history = []
+        if conversation_history:
+            for msg in reversed(conversation_history):
+                role = "user" if msg['message_type'] == 'user' else "assistant"
+                formatted_history.append({"role": role, "content": msg['content']})
+
+        language = wsgi.user_languages.get(user_id)
+        if language is None:
+            version = wsgi.user_languages.versions.get(user_id)
+            language = wsgi.user_languages.from_rows(
+                user_id, await adb.execute_statement('user_language', (user_id,), user_id=user_id), version
+            )
+
+        ai_response = await wsgi.ai_therapist.agenerate_response(user_message, formatted_history, language)
+
+        await adb.execute_statement(
+            'insert_chat_message',
+            (user_id, 'user', user_message, datetime.now()),
+            user_id=user_id
+        )
+        await adb.execute_statement(
+            'insert_chat_message',
+            (user_id, 'bot', ai_response, datetime.now()),
+            user_id=user_id
+        )
+
+        wsgi.activity_tracker.record(user_id, 'chat_message', {'message_length': len(user_message)})
+
+        return JSONResponse({'response': ai_response}, 200)
+
+    except Exception as e:
+        print(f"Chat error: {e}")
+        return JSONResponse({'message': 'Internal server error'}, 500)
+
+
+async def get_user_analytics(request, data, user_id):
+    try:
+        now = datetime.now()
+        # The three aggregates are independent, so they run concurrently on the pool
+        mood_stats, last_week, prev_week = await asyncio.gather(
+            adb.execute_statement('mood_stats_since', (user_id, now - timedelta(days=30)), user_id=user_id),
+            adb.execute_statement('mood_average_since', (user_id, now - timedelta(days=7)), user_id=user_id),
+            adb.execute_statement(
+                'mood_average_between',
+                (user_id, now - timedelta(days=14), now - timedelta(days=7)),
+                user_id=user_id
+            )
+        )
+
+        analytics = {
+            'avg_mood_30_days': round(mood_stats[0]['avg_mood'] or 0, 1),
+            'total_entries': mood_stats[0]['total_entries'],
+            'mood_trend': {
+                'last_week': round(last_week[0]['avg_mood'] or 0, 1),
+                'previous_week': round(prev_week[0]['avg_mood'] or 0, 1)
+            }
+        }
+        return JSONResponse(analytics, 200)
+
+    except Exception as e:
+        print(f"Analytics error: {e}")
+        return JSONResponse({'message': 'Internal server error'}, 500)
+
+
+async def get_user_dashboard(request, data, user_id):
+    try:
+        payload = wsgi.dashboards.get(user_id)
+        if payload is None:
+            version = wsgi.dashboards.versions.get(user_id)
+            payload = wsgi.dashboards.from_rows(user_id, version, await adb.execute_statement(
+                'dashboard_mood_entries',
+                (user_id, wsgi.dashboards.window_start()),
+                user_id=user_id,
+                consistent=True
+            ))
+
+        if payload is None:
+            return JSONResponse({'message': 'Failed to load dashboard'}, 500)
+
+        # Same negotiation as CachedPayload.make_response: each coding is compressed once and has its own ETag
+        encoding = negotiate_encoding(parse_accept_header(request.headers.get('accept-encoding'))) if payload.compressible else None
+        body, etag = payload.variant(encoding)
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+        if payload.matches(parse_etags(request.headers.get('if-none-match'))):
+            if payload.compressible:
+                headers['Vary'] = 'Accept-Encoding'
+            return Response(status_code=304, headers=headers)
+        if body is not payload.body:
+            headers['Content-Encoding'] = encoding
+        return Response(body, 200, headers=headers, media_type=payload.mimetype)
+
+    except Exception as e:
+        print(f"Dashboard error: {e}")
+        return JSONResponse({'message': 'Internal server error'}, 500)
+
+
+# (method, path pattern, handler, idempotent)
+NATIVE_ROUTES = [
+    ('POST', re.compile(r'^/api/mood$'), save_mood, True),
+    ('GET', re.compile(r'^/api/mood/(\d+)$'), get_mood_history, False),
+    ('POST', re.compile(r'^/api/chat$'), chat_with_ai, True),
+    ('GET', re.compile(r'^/api/analytics/(\d+)$'), get_user_analytics, False),
+    ('GET', re.compile(r'^/api/dashboard/(\d+)$'), get_user_dashboard, False)
+]
+
+
+def match_native_route(method, path):
+    for route_method, pattern, handler, idempotent in NATIVE_ROUTES:
+        if method == route_method:
+            match = pattern.match(path)
+            if match:
+                return handler, [int(group) for group in match.groups()], idempotent
+    return None
+
+
+def finalize(request, response):
+    """CORS and compression for native responses, matching what the Flask app adds; encoded bodies are left alone"""
+    origin = request.headers.get('origin')
+    if origin:
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers.append('Vary', 'Origin')
+
+    if response.media_type in COMPRESSIBLE_MIMETYPES:
+        response.headers.append('Vary', 'Accept-Encoding')
+        encoding = negotiate_encoding(parse_accept_header(request.headers.get('accept-encoding')))
+        if encoding and len(response.body) >= 1024 and 'content-encoding' not in response.headers:
+            response.body = compress(response.body, encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Content-Length'] = str(len(response.body))
+    return response
+
+
+async def dispatch(request, handler, path_args, idempotent):
+    """Rate limiting, load shedding and idempotency for native routes, as the Flask hooks do"""
+    body = await request.body()
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+
+    path = request.url.path
+    rejection = wsgi.rate_limiter.check(
+        path,
+        request.client.host if request.client else None,
+        lambda: identity_from(request.headers.get('authorization'), data, wsgi.app.config['SECRET_KEY']),
+        request.headers.get('x-request-start')
+    )
+    if rejection is not None:
+        status, message, retry_after = rejection
+        return JSONResponse({'message': message}, status,
+                            headers={'Retry-After': wsgi.rate_limiter.retry_after_header(retry_after)})
+
+    try:
+        key = request.headers.get(wsgi.idempotency.HEADER) if idempotent else None
+        if not key:
+            return await handler(request, data, *path_args)
+
+        # The key store is a database table; keep its round-trips off the event loop
+        store_key, fingerprint, outcome = await asyncio.to_thread(wsgi.idempotency.begin, path, key, body)
+        if outcome is not None:
+            if len(outcome) == 2:
+                status, message = outcome
+                return JSONResponse({'message': message}, status)
+            stored_body, status, mimetype = outcome
+            return Response(stored_body, status, headers={'Idempotent-Replayed': 'true'}, media_type=mimetype)
+
+        try:
+            response = await handler(request, data, *path_args)
+        except Exception:
+            await asyncio.to_thread(wsgi.idempotency.abort, store_key)
+            raise
+        await asyncio.to_thread(
+            wsgi.idempotency.finish, store_key, fingerprint, response.body, response.status_code, response.media_type
+        )
+        return response
+    finally:
+        wsgi.rate_limiter.release()
+
+
+REMINDER_LOCK_PATH = os.getenv('REMINDER_LOCK_PATH', os.path.join(tempfile.gettempdir(), 'wellmind-reminders.lock'))
+
+_reminder_lock = None
+
+
+def claim_reminders(lock_path=REMINDER_LOCK_PATH, interval=15):
+    """Run the reminder scheduler in the worker holding the lock file; the OS releases it when that worker exits"""
+    global _reminder_lock
+    lock_file = open(lock_path, 'a')
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except OSError:
+            time.sleep(interval)
+    # Keep the file open for the life of the process so the lock is held
+    _reminder_lock = lock_file
+    print(f"Worker {os.getpid()} is running the reminder scheduler")
+    wsgi.reminder_scheduler.load()
+    wsgi.reminder_scheduler.start()
+
+
+class WellMindASGI:
+    """Serves native async routes and falls through to the Flask app for everything else"""
+
+    def __init__(self, flask_app):
+        self.fallback = WSGIMiddleware(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        route = match_native_route(scope.get('method'), scope.get('path', '')) if scope['type'] == 'http' else None
+        if route is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        response = await dispatch(request, *route)
+        await finalize(request, response)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await adb.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                threading.Thread(target=claim_reminders, name='reminder-claim', daemon=True).start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                wsgi.reminder_scheduler.stop()
+                await adb.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+if wsgi.DB_BACKEND == 'mysql' and wsgi.shard_map is None:
+    adb = AioMySQLDatabase(wsgi.DB_CONFIG, wsgi.statements)
+    if wsgi.DB_REPLICA_CONFIGS:
+        # Same replicas, lag checks and read-your-writes stickiness as the Flask routes
+        adb = AsyncReplicatedDatabase(
+            wsgi.db, adb, [AioMySQLDatabase(config, wsgi.statements) for config in wsgi.DB_REPLICA_CONFIGS]
+        )
+else:
+    # SQLite has no async driver here and shard routing is synchronous; both run on the default thread pool
+    adb = ThreadedDatabase(wsgi.db)
+
+app = WellMindASGI(wsgi.app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('asgi_app:app', host='0.0.0.0', port=8000)
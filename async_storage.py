@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+try:
+    import aiomysql
+except ImportError:  # only needed for the MySQL backend in ASGI mode
+    aiomysql = None
+
+
+class AioMySQLDatabase:
+    """
+    Async MySQL access for the ASGI serving mode, on an aiomysql connection pool.
+    Runs the same named statements as DatabaseManager and records into the same
+    StatementRegistry, so timings from both serving modes are comparable.
+    One instance is one server's pool; AsyncReplicatedDatabase routes between them.
+    """
+
+    def __init__(self, config, registry, minsize=5, maxsize=50):
+        self.config = config
+        self.statements = registry
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool = None
+
+    async def start(self):
+        if aiomysql is None:
+            raise RuntimeError("The ASGI serving mode with MySQL requires the 'aiomysql' package")
+        self.pool = await aiomysql.create_pool(
+            host=self.config['host'],
+            port=self.config.get('port', 3306),
+            user=self.config['user'],
+            password=self.config['password'],
+            db=self.config['database'],
+            autocommit=True,
+            minsize=self.minsize,
+            maxsize=self.maxsize
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+
+    async def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        return await self._execute(self.statements.get(name), params)
+
+    async def execute_query(self, query, params=None, user_id=None, consistent=False):
+        return await self._execute(self.statements.for_sql(query), params)
+
+    async def _execute(self, statement, params):
+        started = time.perf_counter()
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(statement.sql, params)
+                    if statement.is_read:
+                        result = await cursor.fetchall()
+                        rows = len(result)
+                    else:
+                        result = cursor.lastrowid
+                        rows = cursor.rowcount
+        except aiomysql.Error as e:
+            self.statements.record(statement, time.perf_counter() - started, 0, failed=True)
+            print(f"Database error: {e}")
+            return None
+
+        elapsed = time.perf_counter() - started
+        if self.statements.record(statement, elapsed, max(rows, 0)):
+            print(f"Slow query ({elapsed * 1000:.1f} ms) {statement.name}")
+        return list(result) if statement.is_read else result
+
+
+class AsyncReplicatedDatabase:
+    """
+    Read/write split for the ASGI mode, with one AioMySQLDatabase pool per server.
+    Routing decisions come from the Flask app's ReplicatedDatabase (`routing`), so
+    both serving modes share one set of recent writers and replica health: a write
+    here keeps the user's reads on the primary in the Flask routes too, and a replica
+    taken out of rotation by either is skipped by both. Picking a reader can run a
+    lag check on a synchronous connection, so it happens on the default thread pool.
+    """
+
+    def __init__(self, routing, primary, replicas):
+        self.routing = routing
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.statements = primary.statements
+
+    async def start(self):
+        for database in [self.primary] + self.replicas:
+            await database.start()
+
+    async def close(self):
+        for database in [self.primary] + self.replicas:
+            await database.close()
+
+    async def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        is_read = self.statements.get(name).is_read
+        return await self._route(is_read, 'execute_statement', name, params, user_id, consistent)
+
+    async def execute_query(self, query, params=None, user_id=None, consistent=False):
+        return await self._route(self.routing.is_read(query), 'execute_query', query, params, user_id, consistent)
+
+    async def _route(self, is_read, method, query, params, user_id, consistent):
+        if is_read:
+            reader = await asyncio.to_thread(self.routing.reader_for, user_id, consistent)
+            if reader is self.routing.primary:
+                return await getattr(self.primary, method)(query, params)
+            result = await getattr(self.replicas[self.routing.replicas.index(reader)], method)(query, params)
+            if result is None:
+                # Replica failed mid-query; take it out of rotation and retry on the primary
+                self.routing.mark_unhealthy(reader)
+                result = await getattr(self.primary, method)(query, params)
+            return result
+
+        result = await getattr(self.primary, method)(query, params)
+        if result is not None:
+            self.routing.mark_write(user_id)
+        return result
+
+
+class ThreadedDatabase:
+    """
+    Runs a synchronous database (e.g. the SQLite backend) on worker threads for async callers.
+    DatabaseManager keeps a connection per thread, so concurrent calls never share a cursor.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        return await asyncio.to_thread(self.db.execute_statement, name, params, user_id=user_id, consistent=consistent)
+
+    async def execute_query(self, query, params=None, user_id=None, consistent=False):
+        return await asyncio.to_thread(self.db.execute_query, query, params, user_id=user_id, consistent=consistent)
@@ -0,0 +1,116 @@
+"""
+Benchmark the WSGI and ASGI serving modes against each other.
+
+Start both servers on the same database, with the LLM replaced by a fixed
+delay so the comparison measures serving concurrency rather than OpenAI,
+and rate limiting off so a single client is not throttled:
+
+    export LLM_SIMULATED_LATENCY_MS=800 RATE_LIMIT_ENABLED=0
+    gunicorn -w 4 --threads 8 -b 127.0.0.1:8000 app:app
+    uvicorn asgi_app:app --workers 4 --host 127.0.0.1 --port 8001
+
+    python bench_serving.py --requests 2000 --concurrency 500
+
+Each mode gets the same request mix; the report shows throughput, error
+counts and latency percentiles per mode.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import aiohttp
+
+
+def build_request(route, user_id):
+    if route == 'chat':
+        return 'POST', '/api/chat', {'message': 'I have been feeling stressed at work', 'user_id': user_id}
+    if route == 'mood':
+        return 'POST', '/api/mood', {'mood_score': random.randint(1, 5), 'notes': 'benchmark', 'user_id': user_id}
+    if route == 'history':
+        return 'GET', f'/api/mood/{user_id}', None
+    return 'GET', f'/api/analytics/{user_id}', None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_mode(base_url, routes, total, concurrency, user_ids, timeout):
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(build_request(routes[i % len(routes)], random.choice(user_ids)))
+
+    async def worker(session):
+        while True:
+            try:
+                method, path, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, json=body) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = 'error'
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'seconds': elapsed,
+        'throughput': total / elapsed if elapsed else 0.0,
+        'statuses': statuses,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0) * 1000
+    }
+
+
+def print_report(results):
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for mode, result in results.items():
+        print(f"{mode:<6} {result['throughput']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['max_ms']:>9.1f}  {result['statuses']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare WSGI and ASGI serving modes")
+    parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--asgi-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--routes', default='chat,mood,history,analytics',
+                        help="comma-separated mix of chat, mood, history, analytics")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--users', type=int, default=1, help="spread requests over user ids 1..N")
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    user_ids = list(range(1, args.users + 1))
+
+    results = {}
+    for mode, url in (('wsgi', args.wsgi_url), ('asgi', args.asgi_url)):
+        print(f"Running {args.requests} requests against {mode} at {url} (concurrency {args.concurrency})...")
+        results[mode] = await run_mode(url, routes, args.requests, args.concurrency, user_ids, args.timeout)
+
+    print()
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
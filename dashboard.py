@@ -0,0 +1,215 @@
+import bisect
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from werkzeug.http import http_date
+
+from http_cache import CachedPayload
+from shared_state import MemoryVersions
+
+
+WINDOW_DAYS = 30
+
+
+class DashboardSnapshot:
+    """One user's 30-day mood series and the aggregates derived from it, serialized once"""
+
+    def __init__(self, user_id, version, entries, now=None):
+        now = now or datetime.now()
+        since = now - timedelta(days=WINDOW_DAYS)
+        self.user_id = user_id
+        self.version = version
+        self.entries = [entry for entry in entries if entry['timestamp'] >= since]
+        self.ids = {entry['id'] for entry in self.entries}
+        self.built_at = time.monotonic()
+        self.payload = self._build_payload(now)
+
+    def with_entry(self, version, entry):
+        """A new snapshot with one more entry; the series stays ordered by timestamp"""
+        entries = list(self.entries)
+        if entry['id'] not in self.ids:
+            timestamps = [existing['timestamp'] for existing in entries]
+            entries.insert(bisect.bisect_right(timestamps, entry['timestamp']), entry)
+        return DashboardSnapshot(self.user_id, version, entries)
+
+    @staticmethod
+    def _average(scores):
+        return round(sum(scores) / len(scores), 1) if scores else 0
+
+    def _build_payload(self, now):
+        # Same windows as the analytics route: 30 days, last 7 days, and the 7 days before them
+        last_week_start, prev_week_start = now - timedelta(days=7), now - timedelta(days=14)
+        scores = [entry['mood_score'] for entry in self.entries]
+        last_week = [entry['mood_score'] for entry in self.entries if entry['timestamp'] >= last_week_start]
+        prev_week = [
+            entry['mood_score'] for entry in self.entries
+            if prev_week_start <= entry['timestamp'] <= last_week_start
+        ]
+
+        dashboard = {
+            'user_id': self.user_id,
+            'version': self.version,
+            'as_of': now,
+            'mood_entries': [
+                {'mood_score': entry['mood_score'], 'notes': entry['notes'], 'timestamp': entry['timestamp']}
+                for entry in self.entries
+            ],
+            'analytics': {
+                'avg_mood_30_days': self._average(scores),
+                'total_entries': len(scores),
+                'mood_trend': {
+                    'last_week': self._average(last_week),
+                    'previous_week': self._average(prev_week)
+                }
+            }
+        }
+        # Encoded like Flask's jsonify (sorted keys, dates as HTTP dates) so clients see the same fields
+        body = json.dumps(dashboard, separators=(',', ':'), sort_keys=True, default=http_date).encode('utf-8')
+        return CachedPayload(body, 'application/json')
+
+
+class DashboardSnapshots:
+    """
+    Precomputed per-user dashboards (mood series, averages and trend).
+    Saving a mood bumps the user's version stamp and queues the entry; a
+    background worker folds it into the cached snapshot, or rebuilds the
+    snapshot with one query when it missed a write. A dashboard load is a
+    stamp comparison and a lookup of the already serialized payload; only a
+    stale or missing snapshot costs a query. Snapshots older than the TTL keep
+    being served while the worker reloads them, so the windows keep moving
+    and writes made outside this process show up.
+    """
+
+    def __init__(self, db, writer_db=None, versions=None, ttl=60, max_entries=10000, max_queue_size=10000):
+        self.db = db
+        # The worker thread gets its own connection so it never shares a cursor with requests
+        self.writer_db = writer_db or db
+        self.versions = versions or MemoryVersions()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.hits = 0
+        self.misses = 0
+        self.applied = 0
+        self.rebuilt = 0
+        self.dropped = 0
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    @staticmethod
+    def window_start():
+        return datetime.now() - timedelta(days=WINDOW_DAYS)
+
+    def _peek(self, user_id):
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(user_id)
+            return snapshot
+
+    def _store(self, snapshot):
+        """Keep the newest snapshot per user; a slower rebuild never replaces a newer one"""
+        with self._lock:
+            current = self._snapshots.get(snapshot.user_id)
+            if current is not None and current.version > snapshot.version:
+                return current
+            self._snapshots[snapshot.user_id] = snapshot
+            self._snapshots.move_to_end(snapshot.user_id)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+            return snapshot
+
+    def get(self, user_id):
+        """The current dashboard payload, or None if it has to be built"""
+        snapshot = self._peek(user_id)
+        if snapshot is None or snapshot.version != self.versions.get(user_id):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if time.monotonic() - snapshot.built_at > self.ttl:
+            self._enqueue(('reload', user_id, None, None, None))
+        return snapshot.payload
+
+    def from_rows(self, user_id, version, rows):
+        """Cache a snapshot built from a dashboard_mood_entries query and return its payload"""
+        if rows is None:
+            return None
+        self.rebuilt += 1
+        return self._store(DashboardSnapshot(user_id, version, rows)).payload
+
+    def _load(self, db, user_id):
+        # Read the stamp first: every write it covers has already committed, so the query sees it
+        version = self.versions.get(user_id)
+        rows = db.execute_statement(
+            'dashboard_mood_entries',
+            (user_id, self.window_start()),
+            user_id=user_id,
+            consistent=True
+        )
+        return self.from_rows(user_id, version, rows)
+
+    def load(self, user_id):
+        payload = self.get(user_id)
+        if payload is None:
+            payload = self._load(self.db, user_id)
+        return payload
+
+    def record(self, user_id, mood_id, mood_score, notes, timestamp):
+        """Call after a mood entry commits; the snapshot is updated in the background"""
+        previous, version = self.versions.bump(user_id)
+        entry = {'id': mood_id, 'mood_score': mood_score, 'notes': notes, 'timestamp': timestamp}
+        self._enqueue(('entry', user_id, previous, version, entry))
+
+    def _enqueue(self, event):
+        if self._worker is None or not self._worker.is_alive():
+            self._start_worker()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # The stamp already moved, so the next load rebuilds the snapshot itself
+            self.dropped += 1
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='dashboard-worker', daemon=True)
+                self._worker.start()
+
+    def _apply(self, kind, user_id, previous, version, entry):
+        snapshot = self._peek(user_id)
+        if kind == 'entry' and snapshot is not None and previous is not None:
+            if snapshot.version >= version:
+                return
+            if snapshot.version == previous:
+                # Nothing was missed since this snapshot, so the new entry is all that changed
+                self._store(snapshot.with_entry(version, entry))
+                self.applied += 1
+                return
+        if kind == 'reload' and (snapshot is None or time.monotonic() - snapshot.built_at <= self.ttl):
+            return
+        self._load(self.writer_db, user_id)
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                self._apply(*event)
+            except Exception as e:
+                print(f"Dashboard worker error: {e}")
+
+    def stats(self):
+        return {
+            'cached': len(self._snapshots),
+            'queued': self.queue.qsize(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'applied': self.applied,
+            'rebuilt': self.rebuilt,
+            'dropped': self.dropped
+        }
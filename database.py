@@ -1,12 +1,39 @@
 import mysql.connector
 from mysql.connector import Error
 import os
+import sqlite3
+from storage import SQLiteBackend
+from sharding import parse_shard_hosts
+
+# Sample wellness resources
+SAMPLE_WELLNESS_RESOURCES = [
+    ("5-Minute Breathing Exercise", "Quick breathing technique for immediate stress relief", "meditation", 
+     "https://example.com/breathing", "Focus on your breath. Inhale for 4 counts, hold for 4, exhale for 6."),
+    
+    ("Daily Mood Journaling", "Learn how to track and understand your emotions", "articles",
+     "https://example.com/journaling", "Writing about your feelings can help you process emotions and identify patterns."),
+    
+    ("10-Minute Morning Yoga", "Gentle yoga routine to start your day positively", "exercise",
+     "https://example.com/yoga", "Simple stretches and poses to energize your body and calm your mind."),
+    
+    ("Crisis Support Resources", "24/7 helplines and emergency contacts", "crisis",
+     "https://example.com/crisis", "National Suicide Prevention Lifeline: 988, Crisis Text Line: Text HOME to 741741"),
+    
+    ("Progressive Muscle Relaxation", "Technique to release physical tension and stress", "meditation",
+     "https://example.com/pmr", "Systematically tense and relax different muscle groups to achieve deep relaxation."),
+    
+    ("Mindful Walking Guide", "How to turn a simple walk into a mindfulness practice", "exercise",
+     "https://example.com/walking", "Pay attention to each step, your breathing, and your surroundings.")
+]
+
+DEMO_PASSWORD_HASH = '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj6hsxq/3vV.'
 
 class DatabaseSetup:
-    def __init__(self):
+    def __init__(self, host='localhost', port=3306):
         self.connection = None
         self.db_config = {
-            'host': 'localhost',
+            'host': host,
+            'port': port,
             'user': 'root',
             'password': 'your-mysql-password'  # Change this to your MySQL password
         }
@@ -94,7 +121,8 @@ class DatabaseSetup:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                UNIQUE KEY unique_user_prefs (user_id)
+                UNIQUE KEY unique_user_prefs (user_id),
+                INDEX idx_prefs_updated_at (updated_at)
             )
             """
             
@@ -128,6 +156,56 @@ class DatabaseSetup:
             )
             """
             
+            # Daily mood summary table (written by the cohort analytics batch)
+            mood_daily_summary_table = """
+            CREATE TABLE IF NOT EXISTS mood_daily_summary (
+                user_id INT NOT NULL,
+                day DATE NOT NULL,
+                entries INT NOT NULL,
+                avg_mood DECIMAL(4,2) NOT NULL,
+                score_1 INT DEFAULT 0,
+                score_2 INT DEFAULT 0,
+                score_3 INT DEFAULT 0,
+                score_4 INT DEFAULT 0,
+                score_5 INT DEFAULT 0,
+                rolling_7_avg DECIMAL(4,2),
+                rolling_30_avg DECIMAL(4,2),
+                volatility_30 DECIMAL(5,3),
+                streak_days INT DEFAULT 0,
+                wow_delta DECIMAL(4,2),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, day),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_day (day)
+            )
+            """
+            
+            # User directory (global; records each user's shard when DB_SHARDS is set)
+            user_directory_table = """
+            CREATE TABLE IF NOT EXISTS user_directory (
+                user_id INT PRIMARY KEY,
+                shard VARCHAR(64) NOT NULL,
+                status ENUM('active', 'moving') NOT NULL DEFAULT 'active',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_shard (shard)
+            )
+            """
+            
+            # Idempotency keys (global; stored responses for retried POSTs, shared by every worker)
+            idempotency_keys_table = """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                store_key CHAR(64) PRIMARY KEY,
+                state VARCHAR(20) NOT NULL,
+                fingerprint CHAR(64) NOT NULL,
+                body MEDIUMBLOB,
+                status SMALLINT,
+                mimetype VARCHAR(100),
+                expires_at DOUBLE NOT NULL,
+                INDEX idx_idempotency_expires (expires_at)
+            )
+            """
+            
             # Execute table creation queries
             tables = [
                 ("users", users_table),
@@ -135,7 +213,10 @@ class DatabaseSetup:
                 ("chat_sessions", chat_sessions_table),
                 ("user_preferences", user_preferences_table),
                 ("wellness_resources", wellness_resources_table),
-                ("user_activity", user_activity_table)
+                ("user_activity", user_activity_table),
+                ("mood_daily_summary", mood_daily_summary_table),
+                ("user_directory", user_directory_table),
+                ("idempotency_keys", idempotency_keys_table)
             ]
             
             for table_name, query in tables:
@@ -154,41 +235,20 @@ class DatabaseSetup:
         try:
             cursor = self.connection.cursor()
             
-            # Sample wellness resources
-            wellness_resources = [
-                ("5-Minute Breathing Exercise", "Quick breathing technique for immediate stress relief", "meditation", 
-                 "https://example.com/breathing", "Focus on your breath. Inhale for 4 counts, hold for 4, exhale for 6."),
-                
-                ("Daily Mood Journaling", "Learn how to track and understand your emotions", "articles",
-                 "https://example.com/journaling", "Writing about your feelings can help you process emotions and identify patterns."),
-                
-                ("10-Minute Morning Yoga", "Gentle yoga routine to start your day positively", "exercise",
-                 "https://example.com/yoga", "Simple stretches and poses to energize your body and calm your mind."),
-                
-                ("Crisis Support Resources", "24/7 helplines and emergency contacts", "crisis",
-                 "https://example.com/crisis", "National Suicide Prevention Lifeline: 988, Crisis Text Line: Text HOME to 741741"),
-                
-                ("Progressive Muscle Relaxation", "Technique to release physical tension and stress", "meditation",
-                 "https://example.com/pmr", "Systematically tense and relax different muscle groups to achieve deep relaxation."),
-                
-                ("Mindful Walking Guide", "How to turn a simple walk into a mindfulness practice", "exercise",
-                 "https://example.com/walking", "Pay attention to each step, your breathing, and your surroundings.")
-            ]
-            
             insert_resources_query = """
             INSERT INTO wellness_resources (title, description, category, content_url, content_text)
             VALUES (%s, %s, %s, %s, %s)
             """
             
-            cursor.executemany(insert_resources_query, wellness_resources)
+            cursor.executemany(insert_resources_query, SAMPLE_WELLNESS_RESOURCES)
             
             # Create a demo user (optional)
             demo_user_query = """
             INSERT INTO users (username, email, password_hash) 
-            VALUES ('demo_user', 'demo@wellmind.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj6hsxq/3vV.')
+            VALUES ('demo_user', 'demo@wellmind.com', %s)
             ON DUPLICATE KEY UPDATE username=username
             """
-            cursor.execute(demo_user_query)
+            cursor.execute(demo_user_query, (DEMO_PASSWORD_HASH,))
             
             self.connection.commit()
             print("Sample data inserted successfully")
@@ -199,9 +259,9 @@ class DatabaseSetup:
             print(f"Error inserting sample data: {e}")
             return False
     
-    def setup_database(self):
-        """Complete database setup process"""
-        print("Starting Well Mind database setup...")
+    def setup_database(self, sample_data=True):
+        """Complete database setup process; shards get the schema without sample data"""
+        print(f"Starting Well Mind database setup on {self.db_config['host']}:{self.db_config['port']}...")
         
         if not self.connect_to_mysql():
             return False
@@ -212,7 +272,7 @@ class DatabaseSetup:
         if not self.create_tables():
             return False
         
-        if not self.insert_sample_data():
+        if sample_data and not self.insert_sample_data():
             return False
         
         print("Database setup completed successfully!")
@@ -224,12 +284,68 @@ class DatabaseSetup:
             self.connection.close()
             print("MySQL connection closed")
 
+class SQLiteDatabaseSetup:
+    """Create and seed an embedded SQLite database (no MySQL server needed)"""
+    
+    def __init__(self, path=None):
+        self.backend = SQLiteBackend(path or os.getenv('SQLITE_PATH', 'wellmind.db'))
+        self.connection = None
+    
+    def setup_database(self):
+        """Create the schema (done on connect) and insert sample data once"""
+        print(f"Starting Well Mind SQLite setup at {self.backend.path}...")
+        try:
+            self.connection = self.backend.connect()
+            cursor = self.connection.cursor()
+            
+            existing = cursor.execute("SELECT COUNT(*) AS total FROM wellness_resources").fetchone()
+            if not existing['total']:
+                cursor.executemany(
+                    "INSERT INTO wellness_resources (title, description, category, content_url, content_text) VALUES (?, ?, ?, ?, ?)",
+                    SAMPLE_WELLNESS_RESOURCES
+                )
+            
+            cursor.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES ('demo_user', 'demo@wellmind.com', ?) ON CONFLICT DO NOTHING",
+                (DEMO_PASSWORD_HASH,)
+            )
+            
+            self.connection.commit()
+            cursor.close()
+            print("Database setup completed successfully!")
+            return True
+        
+        except sqlite3.Error as e:
+            print(f"Error setting up SQLite database: {e}")
+            return False
+    
+    def close_connection(self):
+        """Close database connection"""
+        if self.connection:
+            self.connection.close()
+            print("SQLite connection closed")
+
 def main():
     """Run database setup"""
-    db_setup = DatabaseSetup()
+    if os.getenv('DB_BACKEND') == 'sqlite':
+        db_setup = SQLiteDatabaseSetup()
+    else:
+        db_setup = DatabaseSetup()
     
     try:
         success = db_setup.setup_database()
+        
+        # Shards are separate MySQL instances with the same schema
+        shard_hosts = parse_shard_hosts(os.getenv('DB_SHARDS')) if isinstance(db_setup, DatabaseSetup) else {}
+        for host, port in shard_hosts.values():
+            if not success:
+                break
+            shard_setup = DatabaseSetup(host, port)
+            try:
+                success = shard_setup.setup_database(sample_data=False)
+            finally:
+                shard_setup.close_connection()
+        
         if success:
             print("\n✅ Well Mind database is ready!")
             print("You can now run the Flask application with: python app.py")
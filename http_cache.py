@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain',
+    'application/javascript', 'text/javascript'
+}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def negotiate_encoding(accept_encodings):
+    """Pick the best content coding the client accepts: br, then gzip, else identity"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, best=False):
+    """Compress a body; best=True spends more CPU for payloads compressed once and reused"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else 4)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+
+class CachedPayload:
+    """
+    A response body serialized once, with a strong ETag and compressed variants
+    built on first use and kept for every later request.
+    """
+
+    def __init__(self, body, mimetype, min_size=1024):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.compressible = len(body) >= min_size and mimetype in COMPRESSIBLE_MIMETYPES
+        self._variants = {}
+
+    def variant(self, encoding):
+        """(body, etag) for a content coding; each coding has its own strong ETag"""
+        if encoding is None or not self.compressible:
+            return self.body, self.etag
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = self._variants[encoding] = (compress(self.body, encoding, best=True), f"{self.etag}-{encoding}")
+        return variant
+
+    def matches(self, if_none_match):
+        return any(
+            if_none_match.contains(etag)
+            for etag in (self.etag, f"{self.etag}-gzip", f"{self.etag}-br")
+        )
+
+    def make_response(self, cache_control):
+        """Build the response for the current request, honouring If-None-Match and Accept-Encoding"""
+        encoding = negotiate_encoding(request.accept_encodings) if self.compressible else None
+        body, etag = self.variant(encoding)
+
+        if self.matches(request.if_none_match):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, status=200, mimetype=self.mimetype)
+            if body is not self.body:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        if self.compressible:
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+class ResponseCompressor:
+    """Compresses dynamic JSON/HTML responses above a size threshold"""
+
+    def __init__(self, min_size=1024):
+        self.min_size = min_size
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        if (response.direct_passthrough or
+                response.status_code < 200 or response.status_code in (204, 304) or
+                'Content-Encoding' in response.headers or
+                response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+
+class StaticAssets:
+    """
+    Static files loaded once at startup and served under content-hashed URLs,
+    so they can be cached forever; a changed file gets a new URL.
+    """
+
+    def __init__(self, root, filenames, url_prefix='/assets/'):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.urls = {}
+        self.payloads = {}
+        for filename in filenames:
+            with open(os.path.join(root, filename), 'rb') as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            payload = CachedPayload(body, mimetype)
+            stem, extension = os.path.splitext(filename)
+            hashed_name = f"{stem}.{payload.etag[:12]}{extension}"
+            self.urls[filename] = self.url_prefix + hashed_name
+            self.payloads[hashed_name] = payload
+
+    def url_for(self, filename):
+        return self.urls[filename]
+
+    def get(self, hashed_name):
+        return self.payloads.get(hashed_name)
+
+    def render_page(self, app, filename):
+        """Render an HTML page once, pointing its asset links at the hashed URLs"""
+        with open(os.path.join(self.root, filename), encoding='utf-8') as f:
+            source = f.read()
+        with app.app_context():
+            html = app.jinja_env.from_string(source).render(asset_url=self.url_for)
+        for name, url in self.urls.items():
+            html = html.replace(f'"./{name}"', f'"{url}"')
+        return CachedPayload(html.encode('utf-8'), 'text/html')
@@ -0,0 +1,251 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, jsonify, make_response
+
+
+class MemoryIdempotencyBackend:
+    """
+    Bounded in-process key store with per-entry TTL and LRU eviction.
+    Only correct with a single worker process; RedisIdempotencyBackend (or
+    any object with the same get/add/set/delete methods) shares keys between
+    workers and nodes.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def add(self, key, value, ttl):
+        """Store value only if the key is absent; returns True if it was stored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                return False
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+            return True
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisIdempotencyBackend:
+    """Keys shared by all workers and nodes through Redis (requires the optional `redis` package)"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='wellmind:idem:', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("RedisIdempotencyBackend requires the 'redis' package (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _encode(value):
+        state, fingerprint, *response = value
+        if response:
+            body, status, mimetype = response
+            response = [base64.b64encode(body).decode('ascii'), status, mimetype]
+        return json.dumps([state, fingerprint, *response])
+
+    @staticmethod
+    def _decode(raw):
+        state, fingerprint, *response = json.loads(raw)
+        if not response:
+            return (state, fingerprint)
+        body, status, mimetype = response
+        return (state, fingerprint, base64.b64decode(body), status, mimetype)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else self._decode(raw)
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(self.prefix + key, self._encode(value), px=int(ttl * 1000), nx=True))
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, self._encode(value), px=int(ttl * 1000))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class DatabaseIdempotencyBackend:
+    """
+    Keys in the idempotency_keys table on the primary, so a retry finds the
+    stored response whichever worker or node serves it. Keys are stored as
+    SHA-256 digests; expired rows are replaced when their key is reused and
+    purged in bulk every `purge_every` reservations. Every keyed request and
+    every replay costs primary round-trips, so this is an opt-in for
+    deployments without Redis.
+    """
+
+    def __init__(self, db, purge_every=1000):
+        self.db = db
+        self.purge_every = purge_every
+        self._adds = 0
+
+    @staticmethod
+    def _key(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _row(key, value, expires_at):
+        state, fingerprint, *response = value
+        body, status, mimetype = response or (None, None, None)
+        return (key, state, fingerprint, body, status, mimetype, expires_at)
+
+    def get(self, key):
+        rows = self.db.execute_query(
+            "SELECT state, fingerprint, body, status, mimetype FROM idempotency_keys WHERE store_key = %s AND expires_at >= %s",
+            (self._key(key), time.time()),
+            consistent=True
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        if row['status'] is None:
+            return (row['state'], row['fingerprint'])
+        return (row['state'], row['fingerprint'], bytes(row['body'] or b''), row['status'], row['mimetype'])
+
+    def add(self, key, value, ttl):
+        key, now = self._key(key), time.time()
+        self._adds += 1
+        if self._adds % self.purge_every == 0:
+            self.db.execute_query("DELETE FROM idempotency_keys WHERE expires_at < %s", (now,))
+        else:
+            self.db.execute_query("DELETE FROM idempotency_keys WHERE store_key = %s AND expires_at < %s", (key, now))
+        # execute_many reports affected rows: 0 when another request holds the key
+        inserted = self.db.execute_many(
+            "INSERT IGNORE INTO idempotency_keys (store_key, state, fingerprint, body, status, mimetype, expires_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [self._row(key, value, now + ttl)]
+        )
+        return bool(inserted)
+
+    def set(self, key, value, ttl):
+        self.db.execute_query(
+            "INSERT INTO idempotency_keys (store_key, state, fingerprint, body, status, mimetype, expires_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE state = VALUES(state), "
+            "fingerprint = VALUES(fingerprint), body = VALUES(body), status = VALUES(status), "
+            "mimetype = VALUES(mimetype), expires_at = VALUES(expires_at)",
+            self._row(self._key(key), value, time.time() + ttl)
+        )
+
+    def delete(self, key):
+        self.db.execute_query("DELETE FROM idempotency_keys WHERE store_key = %s", (self._key(key),))
+
+
+class IdempotencyStore:
+    """
+    Replays stored responses for requests carrying an Idempotency-Key header.
+    The first request with a key reserves it, runs the route and stores the
+    response; retries get that response back without re-running the route, so
+    neither MySQL nor OpenAI is touched twice. The default in-memory backend
+    answers replays without any I/O.
+    """
+
+    HEADER = 'Idempotency-Key'
+    IN_PROGRESS = 'in_progress'
+
+    def __init__(self, backend=None, ttl=24 * 60 * 60, in_progress_ttl=60):
+        self.backend = backend or MemoryIdempotencyBackend()
+        self.ttl = ttl
+        self.in_progress_ttl = in_progress_ttl
+        self.replayed = 0
+
+    def begin(self, path, key, body):
+        """
+        Reserve a key before running a route. Returns (store_key, fingerprint, outcome) where
+        outcome is None (run the route), a stored (body, status, mimetype) to replay,
+        or an error (status, message) for a mismatched or still-running request.
+        """
+        store_key = f"{path}:{key}"
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        if self.backend.add(store_key, (self.IN_PROGRESS, fingerprint), self.in_progress_ttl):
+            return store_key, fingerprint, None
+
+        stored = self.backend.get(store_key)
+        if stored is None:
+            # The entry expired between add() and get(); run the route
+            return store_key, fingerprint, None
+        state, stored_fingerprint = stored[0], stored[1]
+        if stored_fingerprint != fingerprint:
+            return store_key, fingerprint, (422, 'Idempotency-Key was already used with a different request')
+        if state == self.IN_PROGRESS:
+            return store_key, fingerprint, (409, 'A request with this Idempotency-Key is still in progress')
+        self.replayed += 1
+        return store_key, fingerprint, stored[2:]
+
+    def finish(self, store_key, fingerprint, body, status, mimetype):
+        """Store the route's response; server errors are dropped so the client can retry them"""
+        if status >= 500:
+            self.backend.delete(store_key)
+        else:
+            self.backend.set(store_key, ('done', fingerprint, body, status, mimetype), self.ttl)
+
+    def abort(self, store_key):
+        self.backend.delete(store_key)
+
+    def idempotent(self, f):
+        """Route decorator; requests without the header run unchanged"""
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.headers.get(self.HEADER)
+            if not key:
+                return f(*args, **kwargs)
+
+            store_key, fingerprint, outcome = self.begin(request.path, key, request.get_data())
+            if outcome is not None:
+                if len(outcome) == 2:
+                    status, message = outcome
+                    return jsonify({'message': message}), status
+                body, status, mimetype = outcome
+                response = make_response(body, status)
+                response.mimetype = mimetype
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                self.abort(store_key)
+                raise
+
+            self.finish(store_key, fingerprint, response.get_data(), response.status_code, response.mimetype)
+            return response
+        return decorated
@@ -0,0 +1,179 @@
+"""
+Production launcher for Well Mind on gunicorn.
+
+    python launcher.py                              # CPU-sized gthread workers on 0.0.0.0:8000
+    BIND=127.0.0.1:5000 WEB_CONCURRENCY=4 GUNICORN_THREADS=16 python launcher.py
+
+The app is imported once in the master (preload), together with the read-only
+assets every worker needs: TextBlob's sentiment lexicon, the response catalog,
+keyword tables and the rendered frontend. Objects are frozen out of the garbage
+collector before forking, so workers share those pages copy-on-write instead
+of each holding a private copy. Rate-limit buckets, the sentiment cache,
+version stamps for dashboards and preferences, recent writers (replica
+stickiness) and counters live in one shared-memory segment created before
+the fork, so every worker on the node sees the same state. Idempotency keys
+are per worker unless IDEMPOTENCY_BACKEND=redis shares them, and the reminder
+owner picks up preferences saved through other workers from
+user_preferences.updated_at.
+
+Behind nginx, set TRUSTED_PROXY_HOPS=1 and pass the client address along
+(gunicorn itself never rewrites REMOTE_ADDR); otherwise every client shares
+the proxy's per-IP rate-limit buckets:
+
+    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    proxy_set_header X-Forwarded-Proto $scheme;
+
+Load shedding watches each worker's backlog of requests waiting for a thread.
+Behind nginx, `proxy_set_header X-Request-Start "t=${msec}";` also lets it shed
+on the time requests spent queued before reaching a worker.
+
+    kill -HUP <master pid>    # graceful reload: new workers start, old ones finish their requests
+    kill -USR2 <master pid>   # code deploy: start a new master on new code, then TERM the old one
+"""
+import gc
+import math
+import os
+import random
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+import shared_state
+
+
+def cgroup_cpu_limit():
+    """CPU quota of the container (cgroup v2 or v1), or None if unlimited"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == 'max' else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    """CPUs this process may run on, capped by a container CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def default_workers():
+    # Requests mostly wait on MySQL and OpenAI, so threads carry the concurrency;
+    # one process per CPU is enough to keep TextBlob and JSON work off a single core
+    return available_cpus()
+
+
+def warm_up(app_module):
+    """Load lazily-initialized read-only data in the master so workers inherit it"""
+    app_module.TextBlob("Warm up the sentiment lexicon before forking").sentiment
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def claim_reminders(app_module, state, interval=15):
+    """Run the reminder scheduler in exactly one worker; another takes over when it exits"""
+    pid = os.getpid()
+    while True:
+        owner = state.counters.get('reminder_owner')
+        if owner != pid and (owner == 0 or not pid_alive(owner)):
+            state.counters.compare_and_set('reminder_owner', owner, pid)
+        if state.counters.get('reminder_owner') == pid:
+            print(f"Worker {pid} is running the reminder scheduler")
+            app_module.reminder_scheduler.load()
+            app_module.reminder_scheduler.start()
+            return
+        time.sleep(interval)
+
+
+def pending_requests(worker):
+    """Requests a gthread worker has read but not yet handed to a thread (its pool exists once the worker starts)"""
+    pool = getattr(worker, 'tpool', None)
+    return pool._work_queue.qsize() if pool is not None else 0
+
+
+class WellMindServer(BaseApplication):
+    """gunicorn application that preloads app.py with a shared-memory segment installed"""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.state = None
+        self.app_module = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set('preload_app', True)
+        self.cfg.set('pre_fork', self.pre_fork)
+        self.cfg.set('post_fork', self.post_fork)
+        self.cfg.set('child_exit', self.child_exit)
+
+    def load(self):
+        if self.app_module is None:
+            # Keep the collector from touching (and so copying) inherited pages until the fork
+            gc.disable()
+            self.state = shared_state.install(shared_state.SharedState())
+            import app as app_module
+            warm_up(app_module)
+            self.app_module = app_module
+        return self.app_module.app
+
+    def pre_fork(self, server, worker):
+        gc.freeze()
+
+    def post_fork(self, server, worker):
+        gc.enable()
+        # Workers would otherwise share the master's random state (used by load shedding)
+        random.seed()
+        self.app_module.rate_limiter.shedder.set_thread_capacity(
+            self.cfg.threads, lambda: pending_requests(worker)
+        )
+        threading.Thread(
+            target=claim_reminders, args=(self.app_module, self.state), name='reminder-claim', daemon=True
+        ).start()
+
+    def child_exit(self, server, worker):
+        # Let a surviving or replacement worker pick up the reminders
+        self.state.counters.compare_and_set('reminder_owner', worker.pid, 0)
+
+
+def main():
+    options = {
+        'bind': os.getenv('BIND', '0.0.0.0:8000'),
+        'workers': int(os.getenv('WEB_CONCURRENCY') or default_workers()),
+        'worker_class': 'gthread',
+        'threads': int(os.getenv('GUNICORN_THREADS', '8')),
+        # Chat requests wait on OpenAI; give them room before a worker counts as stuck
+        'timeout': int(os.getenv('GUNICORN_TIMEOUT', '60')),
+        'graceful_timeout': int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30')),
+        'keepalive': 5
+    }
+    print(f"Starting {options['workers']} workers x {options['threads']} threads on {options['bind']}")
+    WellMindServer(options).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+
+import jwt
+from flask import request, jsonify, current_app
+
+
+class MemoryBucketBackend:
+    """
+    Per-process token buckets stored as [tokens, last_refill] lists.
+    The fast path takes no lock: under the GIL a race between two threads can
+    at worst let one extra request through, which is fine for rate limiting.
+    Only pruning of idle buckets is serialized.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._prune_lock = threading.Lock()
+
+    def take(self, key, rate, capacity, cost=1):
+        """Returns (allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self._buckets.setdefault(key, [capacity, now])
+
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True, 0
+        bucket[0] = tokens
+        return False, (cost - tokens) / rate
+
+    def _prune(self, now):
+        """Drop buckets idle for over an hour; a fresh bucket starts full anyway"""
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            idle = [key for key, (tokens, last) in list(self._buckets.items()) if now - last > 3600]
+            for key in idle:
+                self._buckets.pop(key, None)
+        finally:
+            self._prune_lock.release()
+
+
+class RedisBucketBackend:
+    """Token buckets shared by all workers through Redis (requires the optional `redis` package)"""
+
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate, capacity, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='wellmind:rl:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RedisBucketBackend requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, capacity, cost=1):
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[rate, capacity, cost, time.time()])
+        if allowed:
+            return True, 0
+        return False, (cost - float(tokens)) / rate
+
+
+class SharedBucketBackend:
+    """
+    Token buckets in the node's shared-memory segment (see launcher.py), so all
+    workers on a node draw from the same bucket. Buckets are stored as
+    (tokens, last_refill) on a SharedTable; a bucket evicted from a full set
+    simply starts over full, like a pruned MemoryBucketBackend bucket.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def take(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+
+        def refill(current):
+            tokens = capacity if current is None else min(capacity, current[0] + (now - current[1]) * rate)
+            if tokens >= cost:
+                return tokens - cost, now, (True, 0)
+            return tokens, now, (False, (cost - tokens) / rate)
+
+        # Fail open if the segment is contended past its lock timeout
+        return self.table.update(key, refill, default=(True, 0))
+
+
+def queue_wait_from(request_start, now=None):
+    """
+    Seconds a request waited before the app saw it, from the front proxy's
+    X-Request-Start header ("t=<epoch>" in seconds, milliseconds or
+    microseconds, as nginx, Heroku and others send it). None if absent or implausible.
+    """
+    if not request_start:
+        return None
+    try:
+        started = float(request_start.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    wait = (now or time.time()) - started
+    # Far outside this range the proxy's clock disagrees with ours; don't act on it
+    return max(0.0, wait) if -1 < wait < 3600 else None
+
+
+class LoadShedder:
+    """
+    Adaptive shedding on how far work is queueing up. Three signals each give
+    a shed probability that is 0 below a soft limit, rises linearly, and
+    reaches 1 at the hard limit; the highest one wins:
+
+    - queue wait: time since the front proxy received the request (X-Request-Start)
+    - queue depth: requests waiting for a thread, when the server reports it
+      (launcher.py wires this up for gunicorn's gthread pool)
+    - in-flight requests: for servers without a fixed thread pool (ASGI, the
+      dev server); under gthread it can never exceed the thread count
+
+    In-flight requests are counted with deque append/pop, which are atomic
+    under the GIL, so the fast path takes no lock.
+    """
+
+    def __init__(self, soft_limit=64, hard_limit=128, soft_wait=0.5, hard_wait=2.0,
+                 soft_queue=8, hard_queue=32, queue_depth=None, retry_after=2, counters=None):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.soft_wait = soft_wait
+        self.hard_wait = hard_wait
+        self.soft_queue = soft_queue
+        self.hard_queue = hard_queue
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.counters = counters
+        self.shed = 0
+        self._active = deque()
+
+    @property
+    def in_flight(self):
+        return len(self._active)
+
+    def set_thread_capacity(self, threads, queue_depth):
+        """Shed on the thread pool's backlog: from one waiting request per thread, fully at four"""
+        self.queue_depth = queue_depth
+        self.soft_queue = threads
+        self.hard_queue = 4 * threads
+
+    @staticmethod
+    def _ramp(value, soft, hard):
+        if value < soft:
+            return 0.0
+        return min(1.0, (value - soft + 1) / (hard - soft + 1))
+
+    def probability(self, queue_wait=None):
+        probability = self._ramp(len(self._active), self.soft_limit, self.hard_limit)
+        if queue_wait is not None and queue_wait >= self.soft_wait:
+            probability = max(probability, min(1.0, (queue_wait - self.soft_wait) / (self.hard_wait - self.soft_wait)))
+        if self.queue_depth is not None:
+            probability = max(probability, self._ramp(self.queue_depth(), self.soft_queue, self.hard_queue))
+        return probability
+
+    def enter(self, queue_wait=None):
+        """Returns False if the request should be shed"""
+        probability = self.probability(queue_wait)
+        if probability and random.random() < probability:
+            self.shed += 1
+            if self.counters is not None:
+                self.counters.add('shed')
+            return False
+        self._active.append(None)
+        return True
+
+    def leave(self):
+        self._active.pop()
+
+
+def identity_from(authorization, data, secret_key):
+    """Rate-limit identity: JWT user id, else the user_id or email in the request body"""
+    if authorization:
+        try:
+            token = authorization[7:] if authorization.startswith('Bearer ') else authorization
+            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+            return f"id:{payload['user_id']}"
+        except Exception:
+            pass
+    data = data if isinstance(data, dict) else {}
+    if data.get('user_id') is not None:
+        return f"id:{data['user_id']}"
+    if data.get('email'):
+        return f"email:{str(data['email']).lower()}"
+    return None
+
+
+class RateLimiter:
+    """
+    Per-IP and per-user token-bucket limits with separate quotas per route,
+    plus adaptive load shedding. Quotas are (requests_per_second, burst).
+    Pass shared `counters` to also count rejections across every worker.
+    """
+
+    DEFAULT_QUOTAS = {
+        '/api/chat': {'ip': (30 / 60, 10), 'user': (10 / 60, 5)},
+        '/api/login': {'ip': (10 / 60, 5), 'user': (5 / 60, 5)},
+        '/api/register': {'ip': (5 / 3600, 3)},
+        None: {'ip': (2, 60)}
+    }
+
+    def __init__(self, backend=None, quotas=None, shedder=None, enabled=True, counters=None):
+        self.enabled = enabled
+        self.backend = backend or MemoryBucketBackend()
+        self.quotas = quotas or self.DEFAULT_QUOTAS
+        self.counters = counters
+        self.shedder = shedder or LoadShedder(counters=counters)
+        self.limited = 0
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _user_identity(self):
+        """JWT user id if present, otherwise the user_id or email the client sent"""
+        return identity_from(request.headers.get('Authorization'), request.get_json(silent=True),
+                             current_app.config['SECRET_KEY'])
+
+    def check(self, path, remote_addr, identity, request_start=None):
+        """
+        Framework-neutral limit check. `identity` is a callable so the body is only
+        parsed for routes with a per-user quota; `request_start` is the
+        X-Request-Start header, if any. Returns None if the request may proceed
+        (and must later call release()), else (status, message, retry_after).
+        """
+        if not self.enabled:
+            return None
+
+        quotas = self.quotas.get(path, self.quotas.get(None, {}))
+        route = path if path in self.quotas else 'default'
+
+        if 'ip' in quotas:
+            rate, burst = quotas['ip']
+            allowed, retry_after = self.backend.take(f"ip:{route}:{remote_addr}", rate, burst)
+            if not allowed:
+                self._count_limited()
+                return 429, 'Too many requests', retry_after
+
+        if 'user' in quotas:
+            user = identity()
+            if user:
+                rate, burst = quotas['user']
+                allowed, retry_after = self.backend.take(f"user:{route}:{user}", rate, burst)
+                if not allowed:
+                    self._count_limited()
+                    return 429, 'Too many requests', retry_after
+
+        if not self.shedder.enter(queue_wait_from(request_start)):
+            return 503, 'Server is busy, please retry shortly', self.shedder.retry_after
+        return None
+
+    def _count_limited(self):
+        self.limited += 1
+        if self.counters is not None:
+            self.counters.add('rate_limited')
+
+    def release(self):
+        if self.enabled:
+            self.shedder.leave()
+
+    @staticmethod
+    def retry_after_header(retry_after):
+        return str(max(1, math.ceil(retry_after)))
+
+    def _reject(self, status, message, retry_after):
+        response = jsonify({'message': message})
+        response.status_code = status
+        response.headers['Retry-After'] = self.retry_after_header(retry_after)
+        return response
+
+    def _before_request(self):
+        if request.method == 'OPTIONS' or not request.path.startswith('/api/'):
+            return None
+
+        rejection = self.check(request.path, request.remote_addr, self._user_identity,
+                               request.headers.get('X-Request-Start'))
+        if rejection is not None:
+            return self._reject(*rejection)
+        request.environ['wellmind.shed_tracked'] = True
+        return None
+
+    def _teardown_request(self, exc):
+        if request.environ.pop('wellmind.shed_tracked', False):
+            self.release()
+
+    def stats(self):
+        stats = {
+            'limited': self.limited,
+            'shed': self.shedder.shed,
+            'in_flight': self.shedder.in_flight
+        }
+        if self.counters is not None:
+            stats['node_limited'] = self.counters.get('rate_limited')
+            stats['node_shed'] = self.counters.get('shed')
+        return stats
@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from sharding import partitions
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minute_of_day(reminder_time):
+    """Convert a MySQL TIME value (timedelta), a time object or 'HH:MM[:SS]' to minutes since midnight"""
+    if isinstance(reminder_time, timedelta):
+        return int(reminder_time.total_seconds() // 60) % MINUTES_PER_DAY
+    if isinstance(reminder_time, str):
+        parts = reminder_time.split(':')
+        return (int(parts[0]) * 60 + int(parts[1])) % MINUTES_PER_DAY
+    return reminder_time.hour * 60 + reminder_time.minute
+
+
+def to_datetime(value):
+    """A TIMESTAMP value as datetime (SQLite returns aggregates as text); None becomes the epoch"""
+    if value is None:
+        return datetime(1970, 1, 1)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class FileReminderSink:
+    """Append each dispatched batch to a local JSON-lines file (for development and tests)"""
+
+    def __init__(self, path='reminders.log'):
+        self.path = path
+
+    def send(self, user_ids, due_at):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'due_at': due_at.isoformat(), 'user_ids': user_ids}) + '\n')
+        return True
+
+
+class WebhookReminderSink:
+    """POST each dispatched batch to a webhook that fans out the actual notifications"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, user_ids, due_at):
+        try:
+            response = self.session.post(
+                self.url,
+                json={'due_at': due_at.isoformat(), 'user_ids': user_ids},
+                timeout=self.timeout
+            )
+            return response.ok
+        except requests.RequestException as e:
+            print(f"Reminder webhook error: {e}")
+            return False
+
+
+class ReminderScheduler:
+    """
+    Daily reminder dispatcher built on a timing wheel.
+    The wheel has one bucket per minute of the day holding the user ids due at
+    that minute. It is loaded once from user_preferences and then kept current
+    through update_preference(), so a tick only touches the buckets that just
+    came due instead of polling the whole table. Preferences saved by other
+    processes (other workers or nodes) are picked up before each tick from the
+    rows whose updated_at moved past the last one seen.
+
+    Ticks follow the local wall clock, checked against time.monotonic(): a
+    reading that the clock stepping back explains better than time passing
+    (an NTP step, the DST fall-back) dispatches nothing, and the buckets
+    already sent are not sent again when the clock passes them once more.
+    """
+
+    def __init__(self, db, sink, batch_size=1000, tick_interval=15, sync_overlap=60):
+        self.db = db
+        self.sink = sink
+        self.batch_size = batch_size
+        self.tick_interval = tick_interval
+        # Re-read this many seconds before the newest updated_at seen, for rows committed late
+        self.sync_overlap = sync_overlap
+        self.wheel = [set() for _ in range(MINUTES_PER_DAY)]
+        self.user_minutes = {}
+        self.synced_until = {}
+        self.last_processed = None
+        self.last_tick_at = None
+        self.dispatched = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def load(self, page_size=10000):
+        """Build the wheel from user_preferences (on every shard) with keyset pagination"""
+        loaded = 0
+        for index, db in enumerate(partitions(self.db)):
+            latest = db.execute_query("SELECT MAX(updated_at) AS latest FROM user_preferences")
+            self.synced_until[index] = to_datetime(latest[0]['latest'] if latest else None)
+            last_user_id = 0
+            while True:
+                rows = db.execute_query(
+                    "SELECT user_id, reminder_time FROM user_preferences WHERE notification_enabled = TRUE AND user_id > %s ORDER BY user_id LIMIT %s",
+                    (last_user_id, page_size)
+                )
+                if not rows:
+                    break
+                with self._lock:
+                    for row in rows:
+                        self._schedule(row['user_id'], to_minute_of_day(row['reminder_time']))
+                loaded += len(rows)
+                last_user_id = rows[-1]['user_id']
+                if len(rows) < page_size:
+                    break
+        return loaded
+
+    def _schedule(self, user_id, minute):
+        previous = self.user_minutes.get(user_id)
+        if previous is not None:
+            self.wheel[previous].discard(user_id)
+        self.user_minutes[user_id] = minute
+        self.wheel[minute].add(user_id)
+
+    def update_preference(self, user_id, notification_enabled, reminder_time):
+        """Move a single user between buckets after their preferences change"""
+        with self._lock:
+            if notification_enabled:
+                self._schedule(user_id, to_minute_of_day(reminder_time))
+            else:
+                previous = self.user_minutes.pop(user_id, None)
+                if previous is not None:
+                    self.wheel[previous].discard(user_id)
+
+    def sync(self):
+        """Apply preferences saved since the last sync; returns the number of rows applied"""
+        applied = 0
+        for index, db in enumerate(partitions(self.db)):
+            since = self.synced_until.get(index)
+            if since is None:
+                continue
+            rows = db.execute_query(
+                "SELECT user_id, notification_enabled, reminder_time, updated_at FROM user_preferences WHERE updated_at >= %s ORDER BY updated_at",
+                (since - timedelta(seconds=self.sync_overlap),)
+            )
+            if not rows:
+                continue
+            for row in rows:
+                self.update_preference(row['user_id'], row['notification_enabled'], row['reminder_time'])
+            self.synced_until[index] = max(since, to_datetime(rows[-1]['updated_at']))
+            applied += len(rows)
+        return applied
+
+    def _due_minutes(self, now, monotonic_now):
+        """
+        Minutes of the day that came due since the last tick (wrapping past
+        midnight), or None if the wall clock stepped back since then
+        """
+        current = now.hour * 60 + now.minute
+        if self.last_processed is None:
+            return [current]
+        span = (current - self.last_processed) % MINUTES_PER_DAY
+        # No more minute boundaries than this can really have passed since the last tick
+        elapsed = int((monotonic_now - self.last_tick_at) // 60) + 1
+        if span > elapsed and MINUTES_PER_DAY - span < span - elapsed:
+            return None
+        return [(self.last_processed + step) % MINUTES_PER_DAY for step in range(1, span + 1)]
+
+    def tick(self, now=None, monotonic_now=None):
+        """Dispatch every bucket that came due since the previous tick"""
+        now = now or datetime.now()
+        monotonic_now = time.monotonic() if monotonic_now is None else monotonic_now
+        current = now.hour * 60 + now.minute
+        due = self._due_minutes(now, monotonic_now)
+        self.last_tick_at = monotonic_now
+        if due is None:
+            # Wait for the clock to pass the last minute sent rather than repeat or skip a day
+            return 0
+
+        sent = 0
+        for minute in due:
+            with self._lock:
+                user_ids = list(self.wheel[minute])
+            due_at = now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+            if minute > current:
+                due_at -= timedelta(days=1)
+            for offset in range(0, len(user_ids), self.batch_size):
+                batch = user_ids[offset:offset + self.batch_size]
+                if self.sink.send(batch, due_at):
+                    sent += len(batch)
+                else:
+                    self.failed += len(batch)
+        self.last_processed = current
+        self.dispatched += sent
+        return sent
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+                self.tick()
+            except Exception as e:
+                print(f"Reminder scheduler error: {e}")
+            self._stop.wait(self.tick_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        return {
+            'scheduled_users': len(self.user_minutes),
+            'dispatched': self.dispatched,
+            'failed': self.failed
+        }
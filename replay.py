@@ -0,0 +1,270 @@
+"""
+Replay a JSONL capture of API calls against a running Well Mind instance.
+
+Each line is one recorded request:
+
+    {"ts": 1718000000.25, "method": "POST", "path": "/api/chat",
+     "body": {"message": "...", "user_id": 1}, "headers": {"Idempotency-Key": "..."}, "status": 200}
+
+`ts` (epoch seconds or ISO 8601) drives the timing, `status` is the response
+status expected back, and `body`/`headers` are optional. Lines without a
+method and path are skipped, so other JSONL files can be pointed at safely.
+The capture is streamed and latencies go into fixed-size histograms (about 1%
+resolution), so arbitrarily long recordings replay in constant memory.
+
+    python replay.py traffic_sample.jsonl                          # original timing
+    python replay.py capture.jsonl --speed 10 --concurrency 200    # 10x faster
+    python replay.py capture.jsonl --speed 0 --routes /api/chat,/api/mood --report report.json
+
+Exits non-zero when the share of failed or unexpected responses exceeds
+--max-failure-rate, so a replay can gate a perf regression run.
+"""
+import argparse
+import asyncio
+import json
+import math
+import re
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+
+
+
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def route_of(method, path):
+    """Group /api/mood/42 and /api/mood/7 together in the report"""
+    return f"{method} {ID_SEGMENT.sub('/<id>', path.split('?', 1)[0])}"
+
+
+def parse_timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def read_capture(path, routes=None):
+    """Yield (timestamp, record) for each replayable line, counting the rest as skipped"""
+    stats = {'skipped': 0}
+
+    def records():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    method, request_path = record['method'].upper(), record['path']
+                    timestamp = parse_timestamp(record.get('ts'))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    stats['skipped'] += 1
+                    continue
+                if routes and not any(request_path.startswith(prefix) for prefix in routes):
+                    stats['skipped'] += 1
+                    continue
+                record['method'] = method
+                yield timestamp, record
+
+    return records(), stats
+
+
+class Histogram:
+    """
+    Durations in log-spaced buckets 1% wide from 1 µs up, so memory stays
+    bounded (a few thousand buckets at most) however many values are added.
+    Percentiles come back as the bucket's upper edge, within 1% of the exact value.
+    """
+
+    FLOOR = 1e-6
+    GROWTH = 1.01
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        bucket = max(0, math.ceil(math.log(max(value, self.FLOOR) / self.FLOOR, self.GROWTH)))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Same rank rule as bench_serving.percentile"""
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(round(fraction * (self.count - 1))))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return min(self.FLOOR * self.GROWTH ** bucket, self.max)
+        return self.max
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = Histogram()
+        self.statuses = {}
+        self.failures = 0
+
+    def add(self, latency, status, ok):
+        self.latencies.add(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.failures += 1
+
+    def summary(self, elapsed):
+        latencies = self.latencies
+        return {
+            'requests': latencies.count,
+            'failures': self.failures,
+            'throughput': latencies.count / elapsed if elapsed else 0.0,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'p50_ms': latencies.percentile(0.50) * 1000,
+            'p95_ms': latencies.percentile(0.95) * 1000,
+            'p99_ms': latencies.percentile(0.99) * 1000,
+            'max_ms': latencies.max * 1000
+        }
+
+
+async def replay(base_url, capture, speed, concurrency, timeout, default_status):
+    """Send each record at its (scaled) offset from the first one; returns per-route stats and timings"""
+    routes = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+    lag = Histogram()
+
+    async def send(session, record):
+        expected = record.get('status', default_status)
+        started = time.perf_counter()
+        try:
+            body = record.get('body')
+            async with session.request(
+                record['method'],
+                base_url + record['path'],
+                json=body if isinstance(body, (dict, list)) else None,
+                data=body if isinstance(body, str) else None,
+                headers=record.get('headers')
+            ) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = 'error'
+        finally:
+            semaphore.release()
+        ok = status == expected if expected is not None else isinstance(status, int) and status < 500
+        route = route_of(record['method'], record['path'])
+        routes.setdefault(route, RouteStats()).add(time.perf_counter() - started, status, ok)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first_ts = None
+
+        for timestamp, record in capture:
+            if speed > 0 and timestamp is not None:
+                if first_ts is None:
+                    first_ts = timestamp
+                due = started + (timestamp - first_ts) / speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # Bounded in-flight requests; a full window delays the schedule and shows up as lag
+            await semaphore.acquire()
+            # Records without a timestamp are sent as soon as they are read, so they have no schedule to lag
+            if speed > 0 and timestamp is not None and first_ts is not None:
+                lag.add(max(0.0, loop.time() - (started + (timestamp - first_ts) / speed)))
+
+            task = asyncio.create_task(send(session, record))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending)
+        elapsed = loop.time() - started
+
+    return routes, elapsed, lag
+
+
+def build_report(routes, elapsed, lag, skipped):
+    total = RouteStats()
+    for stats in routes.values():
+        total.latencies.merge(stats.latencies)
+        total.failures += stats.failures
+        for status, count in stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+    return {
+        'seconds': round(elapsed, 3),
+        'skipped_lines': skipped,
+        'schedule_lag_p99_ms': lag.percentile(0.99) * 1000,
+        'total': total.summary(elapsed),
+        'routes': {route: stats.summary(elapsed) for route, stats in sorted(routes.items())}
+    }
+
+
+def print_report(report):
+    print(f"{'route':<28} {'reqs':>6} {'fail':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    rows = list(report['routes'].items()) + [('TOTAL', report['total'])]
+    for route, result in rows:
+        print(f"{route:<28} {result['requests']:>6} {result['failures']:>5} {result['throughput']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['max_ms']:>8.1f}  "
+              f"{result['statuses']}")
+    print(f"\n{report['seconds']} s elapsed, {report['skipped_lines']} lines skipped, "
+          f"p99 schedule lag {report['schedule_lag_p99_ms']:.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL API capture against a running instance")
+    parser.add_argument('capture', help="JSONL file, one recorded request per line")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="time scale: 1 keeps the recorded timing, 10 is ten times faster, 0 sends as fast as possible")
+    parser.add_argument('--concurrency', type=int, default=100, help="maximum requests in flight")
+    parser.add_argument('--routes', help="comma-separated path prefixes to replay, e.g. /api/chat,/api/mood")
+    parser.add_argument('--expect', type=int,
+                        help="status expected for records without one (default: anything below 500)")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--report', help="also write the report as JSON to this file")
+    parser.add_argument('--max-failure-rate', type=float, default=0.0,
+                        help="exit non-zero when failures / requests exceeds this")
+    args = parser.parse_args()
+
+    routes = [prefix.strip() for prefix in args.routes.split(',')] if args.routes else None
+    capture, capture_stats = read_capture(args.capture, routes)
+
+    print(f"Replaying {args.capture} against {args.url} (speed {args.speed or 'max'}, concurrency {args.concurrency})...")
+    results, elapsed, lag = await replay(args.url.rstrip('/'), capture, args.speed, args.concurrency,
+                                         args.timeout, args.expect)
+    report = build_report(results, elapsed, lag, capture_stats['skipped'])
+
+    print()
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    total = report['total']
+    if total['requests'] and total['failures'] / total['requests'] > args.max_failure_rate:
+        print(f"Failure rate {total['failures'] / total['requests']:.1%} exceeds {args.max_failure_rate:.1%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,131 @@
+import itertools
+import threading
+import time
+
+
+class ReplicatedDatabase:
+    """
+    Routes queries between a primary and read replicas.
+    Writes always go to the primary. Reads go to a healthy replica, except for
+    a user who wrote within the last `sticky_seconds`; their reads stay on the
+    primary so they always see their own writes. Replicas whose lag exceeds
+    `max_lag` seconds (or that cannot report it) are skipped until they recover.
+    Recent writers are tracked per process unless `recent_writes` (a SharedCache
+    with a TTL of sticky_seconds, see shared_state.py) makes them node-wide.
+    The ASGI mode's AsyncReplicatedDatabase routes through the same instance.
+    """
+
+    def __init__(self, primary, replicas=None, max_lag=5, sticky_seconds=10, lag_check_interval=5, recent_writes=None):
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.recent_writes = recent_writes
+        self.lag_check_interval = lag_check_interval
+        self._last_write = {}
+        self._health = {}
+        self._round_robin = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_read(query):
+        return query.lstrip()[:6].upper() == 'SELECT'
+
+    def _replica_lag(self, replica):
+        """Seconds behind the primary, or None if unknown"""
+        status = replica.execute_query("SHOW REPLICA STATUS")
+        if not status:
+            # MySQL < 8.0.22 only knows the old statement and column names
+            status = replica.execute_query("SHOW SLAVE STATUS")
+            if not status:
+                return None
+            return status[0].get('Seconds_Behind_Master')
+        return status[0].get('Seconds_Behind_Source')
+
+    def _is_healthy(self, index):
+        now = time.monotonic()
+        checked_at, healthy = self._health.get(index, (0, False))
+        if now - checked_at < self.lag_check_interval:
+            return healthy
+
+        lag = self._replica_lag(self.replicas[index])
+        healthy = lag is not None and lag <= self.max_lag
+        if not healthy:
+            print(f"Replica {index} unavailable or lagging (lag={lag}); reading from primary")
+        self._health[index] = (now, healthy)
+        return healthy
+
+    def _is_sticky(self, user_id):
+        if user_id is None:
+            return False
+        if self.recent_writes is not None:
+            return self.recent_writes.get(str(user_id)) is not None
+        last_write = self._last_write.get(user_id)
+        return last_write is not None and time.monotonic() - last_write < self.sticky_seconds
+
+    def mark_write(self, user_id):
+        """Keep this user's reads on the primary for sticky_seconds"""
+        if user_id is None or not self.replicas:
+            # Stickiness only matters when there are replicas to read from
+            return
+        if self.recent_writes is not None:
+            self.recent_writes.set(str(user_id), 1.0)
+            return
+        now = time.monotonic()
+        self._last_write[user_id] = now
+        if len(self._last_write) > 100000:
+            with self._lock:
+                expired = [uid for uid, ts in list(self._last_write.items()) if now - ts >= self.sticky_seconds]
+                for uid in expired:
+                    self._last_write.pop(uid, None)
+
+    def mark_unhealthy(self, replica):
+        """Take a replica that failed a query out of rotation until its next lag check"""
+        self._health[self.replicas.index(replica)] = (time.monotonic(), False)
+
+    def reader_for(self, user_id=None, consistent=False):
+        """Pick the connection a read for this user should use"""
+        if consistent or not self.replicas or self._is_sticky(user_id):
+            return self.primary
+        for _ in range(len(self.replicas)):
+            index = next(self._round_robin)
+            if self._is_healthy(index):
+                return self.replicas[index]
+        return self.primary
+
+    def execute_query(self, query, params=None, user_id=None, consistent=False):
+        """Run a query; pass consistent=True for reads that must never see replica lag"""
+        return self._route(self.is_read(query), 'execute_query', query, params, user_id, consistent)
+
+    def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        """Run a named statement from the primary's statement registry with the same routing"""
+        is_read = self.primary.statements.get(name).is_read
+        return self._route(is_read, 'execute_statement', name, params, user_id, consistent)
+
+    def _route(self, is_read, method, query, params, user_id, consistent):
+        if is_read:
+            replica = self.reader_for(user_id, consistent)
+            result = getattr(replica, method)(query, params)
+            if result is None and replica is not self.primary:
+                # Replica failed mid-query; take it out of rotation and retry on the primary
+                self.mark_unhealthy(replica)
+                result = getattr(self.primary, method)(query, params)
+            return result
+
+        result = getattr(self.primary, method)(query, params)
+        if result is not None:
+            self.mark_write(user_id)
+        return result
+
+    def execute_many(self, query, params_list, user_id=None):
+        result = self.primary.execute_many(query, params_list)
+        if result is not None:
+            self.mark_write(user_id)
+        return result
+
+    def connect(self):
+        return self.primary.connect()
+
+    def disconnect(self):
+        for manager in [self.primary] + self.replicas:
+            manager.disconnect()
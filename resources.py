@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+
+from http_cache import CachedPayload
+
+
+class ResourceCatalog:
+    """
+    In-memory snapshot of the wellness_resources table.
+    The catalog is nearly static, so it is loaded once and served from memory
+    until the TTL expires. If the database is unavailable the previous
+    snapshot keeps being served and the load is retried after retry_interval;
+    before the first successful load there is nothing to serve.
+    """
+
+    CATEGORIES = ('meditation', 'exercise', 'articles', 'crisis')
+
+    def __init__(self, db, ttl=300, retry_interval=5):
+        self.db = db
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._next_refresh = 0
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return bool(self._payloads)
+
+    def _is_stale(self):
+        return time.monotonic() >= self._next_refresh
+
+    def _build_payload(self, resources):
+        """Serialize once; the payload derives a strong ETag from the exact body bytes"""
+        body = json.dumps({'resources': resources}, separators=(',', ':'),
+                          ensure_ascii=False).encode('utf-8')
+        return CachedPayload(body, 'application/json')
+
+    def refresh(self):
+        """Reload all active resources from the database; returns False if that failed"""
+        rows = self.db.execute_query(
+            "SELECT id, title, description, category, content_url, content_text "
+            "FROM wellness_resources WHERE is_active = TRUE ORDER BY category, id"
+        )
+        if rows is None:
+            # Keep whatever snapshot there is (possibly none) and try again shortly
+            self._next_refresh = time.monotonic() + self.retry_interval
+            return False
+
+        by_category = {category: [] for category in self.CATEGORIES}
+        for row in rows:
+            by_category.setdefault(row['category'], []).append(row)
+
+        payloads = {None: self._build_payload(list(rows))}
+        for category, resources in by_category.items():
+            payloads[category] = self._build_payload(resources)
+
+        self._payloads = payloads
+        self._next_refresh = time.monotonic() + self.ttl
+        return True
+
+    def get(self, category=None):
+        """Return the CachedPayload for a category, or None if the category is unknown or nothing is loaded"""
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self.refresh()
+        return self._payloads.get(category)
@@ -0,0 +1,119 @@
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from shared_state import MemoryVersions
+
+
+ANY_SENTIMENT = 'any'
+
+
+def normalize_template(template):
+    """Join a template given as a list of lines and drop stray indentation and trailing spaces"""
+    if isinstance(template, list):
+        template = '\n'.join(template)
+    return '\n'.join(line.strip() for line in template.strip().splitlines())
+
+
+class ResponseCatalog:
+    """
+    Canned chat replies loaded once from responses.json.
+    Templates are normalized at load time and indexed by (language, category,
+    sentiment), so picking a reply is a few dict lookups and a random.choice
+    over a prebuilt tuple. Languages without a template fall back to the
+    default language; sentiments without one fall back to 'any'.
+    """
+
+    def __init__(self, templates, default_language='en'):
+        self.default_language = default_language
+        self._index = {}
+        for language, categories in templates.items():
+            for category, sentiments in categories.items():
+                for sentiment, variants in sentiments.items():
+                    self._index[(language, category, sentiment)] = tuple(
+                        normalize_template(variant) for variant in variants
+                    )
+
+    @classmethod
+    def load(cls, path, name):
+        """Load one named catalog (e.g. 'mindbot') from the data file"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['catalogs'][name], data.get('default_language', 'en'))
+
+    def variants(self, category, sentiment=ANY_SENTIMENT, language=None):
+        index = self._index
+        for lang in (language or self.default_language, self.default_language):
+            variants = index.get((lang, category, sentiment)) or index.get((lang, category, ANY_SENTIMENT))
+            if variants:
+                return variants
+        raise KeyError(f"No response template for {category}/{sentiment}")
+
+    def select(self, category, sentiment=ANY_SENTIMENT, language=None):
+        variants = self.variants(category, sentiment, language)
+        return variants[0] if len(variants) == 1 else random.choice(variants)
+
+
+class UserLanguages:
+    """
+    Bounded cache of user_preferences.language, filled on first use and
+    updated when preferences are saved, so choosing a reply language does not
+    cost a query per chat message. Saving preferences bumps the user's version
+    stamp; with the launcher's shared stamps every worker on the node sees the
+    change, and entries older than the TTL are looked up again so changes made
+    on other nodes show up too.
+    """
+
+    def __init__(self, db, versions=None, default='en', ttl=300, max_entries=10000):
+        self.db = db
+        self.versions = versions or MemoryVersions()
+        self.default = default
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._languages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Cached language, or None if this user has to be looked up"""
+        with self._lock:
+            entry = self._languages.get(user_id)
+            if entry is None:
+                return None
+            language, version, cached_at = entry
+            if time.monotonic() - cached_at > self.ttl or version != self.versions.get(user_id):
+                del self._languages[user_id]
+                return None
+            self._languages.move_to_end(user_id)
+            return language
+
+    def _cache(self, user_id, language, version):
+        language = (language or self.default).lower()
+        with self._lock:
+            self._languages[user_id] = (language, version, time.monotonic())
+            self._languages.move_to_end(user_id)
+            while len(self._languages) > self.max_entries:
+                self._languages.popitem(last=False)
+        return language
+
+    def set(self, user_id, language):
+        """Record a saved preference; other workers drop their cached copy"""
+        _, version = self.versions.bump(user_id)
+        return self._cache(user_id, language, version)
+
+    def from_rows(self, user_id, rows, version):
+        """Cache the result of a user_language query run after reading `version` and return the language"""
+        if rows is None:
+            # Query failed; answer with the default but look it up again next time
+            return self.default
+        return self._cache(user_id, rows[0]['language'] if rows else None, version)
+
+    def lookup(self, user_id):
+        language = self.get(user_id)
+        if language is None:
+            # Read the stamp before the query, so a save racing with it makes this entry stale
+            version = self.versions.get(user_id)
+            rows = self.db.execute_statement('user_language', (user_id,), user_id=user_id)
+            language = self.from_rows(user_id, rows, version)
+        return language
@@ -312,7 +312,7 @@ class WellMindApp {
 
     async loadUserMoodData() {
         try {
-            const response = await fetch(`/api/mood/${this.currentUser?.id || 1}`);
+            const response = await fetch(`/api/dashboard/${this.currentUser?.id || 1}`);
             const data = await response.json();
             
             if (response.ok) {
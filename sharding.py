@@ -0,0 +1,481 @@
+"""
+Per-user sharding of the high-volume tables across several MySQL instances.
+
+The primary database keeps the global tables (users, user_directory,
+wellness_resources); mood_entries, chat_sessions, user_preferences,
+user_activity and mood_daily_summary live on the shard that owns the user.
+A user's shard is placed by a consistent-hash ring on first use and recorded
+in user_directory, which stays the source of truth after rebalancing.
+
+Shards generate ids in disjoint sequences: the shard at position i of
+DB_SHARDS uses auto_increment_offset i + 1 with auto_increment_increment
+MAX_SHARDS, so a user's rows keep their ids when they move. Append new
+shards to DB_SHARDS and never reorder it, and run `reserve-ids` before a new
+shard takes traffic so it starts above the ids that already exist.
+
+Local test setup with three MySQL instances (one global, two shards):
+
+    docker run -d -p 3306:3306 -e MYSQL_ROOT_PASSWORD=your-mysql-password mysql:8
+    docker run -d -p 3311:3306 -e MYSQL_ROOT_PASSWORD=your-mysql-password mysql:8
+    docker run -d -p 3312:3306 -e MYSQL_ROOT_PASSWORD=your-mysql-password mysql:8
+    export DB_SHARDS="shard0=127.0.0.1:3311,shard1=127.0.0.1:3312"
+    python database.py                      # global schema plus every shard's schema
+    python app.py
+
+Rebalancing tools (run with the same DB_SHARDS as the app):
+
+    python sharding.py plan                 # users whose shard differs from the ring
+    python sharding.py move USER_ID SHARD   # move one user's rows online
+    python sharding.py rebalance [--limit N]
+    python sharding.py bootstrap SHARD      # record every existing user as living on SHARD
+    python sharding.py reserve-ids          # start every shard's ids above the current maximum
+"""
+import argparse
+import bisect
+import hashlib
+import re
+import time
+
+
+# Per-user tables; every other table is global and stays on the primary
+SHARDED_TABLES = ('mood_entries', 'chat_sessions', 'user_preferences', 'user_activity', 'mood_daily_summary')
+
+SHARDED_TABLE_PATTERN = re.compile(r'\b(' + '|'.join(SHARDED_TABLES) + r')\b', re.IGNORECASE)
+
+# Per-user tables with an AUTO_INCREMENT id
+KEYED_TABLES = ('mood_entries', 'chat_sessions', 'user_preferences', 'user_activity')
+
+MAX_SHARDS = 64
+
+
+def shard_id_space(index):
+    """Session settings that give the shard at `index` its own id sequence"""
+    if not 0 <= index < MAX_SHARDS:
+        raise ValueError(f"At most {MAX_SHARDS} shards are supported")
+    return {'auto_increment_increment': MAX_SHARDS, 'auto_increment_offset': index + 1}
+
+
+def parse_shard_hosts(value):
+    """Parse "name=host[:port],..." into an ordered {name: (host, port)}"""
+    shards = {}
+    for entry in filter(None, (value or '').split(',')):
+        name, _, address = entry.strip().partition('=')
+        host, _, port = address.partition(':')
+        if not name or not host:
+            raise ValueError(f"Invalid shard entry '{entry}', expected name=host[:port]")
+        shards[name] = (host, int(port or 3306))
+    return shards
+
+
+class ShardMap:
+    """
+    Consistent-hash ring over shard names. Each shard owns `vnodes` points, so
+    adding a shard only reassigns about 1/N of the users to it.
+    """
+
+    def __init__(self, shard_names, vnodes=128):
+        if not shard_names:
+            raise ValueError("ShardMap needs at least one shard")
+        self.shard_names = list(shard_names)
+        points = sorted(
+            (self._hash(f"{name}#{vnode}"), name)
+            for name in self.shard_names
+            for vnode in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [name for _, name in points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(str(key).encode('utf-8')).digest()[:8], 'big')
+
+    def shard_for(self, user_id):
+        index = bisect.bisect(self._points, self._hash(user_id)) % len(self._points)
+        return self._owners[index]
+
+
+class ShardedDatabase:
+    """
+    Routes each query to the global database or to the shard owning the user.
+    Queries that touch a per-user table must pass user_id; batched inserts
+    without one are split by their first column, which is user_id in every
+    per-user table. Placements are cached for `placement_ttl` seconds, and
+    writes for a user that is being moved are rejected until the move ends.
+    """
+
+    def __init__(self, directory, shards, shard_map=None, placement_ttl=5, max_cached=100000):
+        self.directory = directory
+        self.shards = dict(shards)
+        self.shard_map = shard_map or ShardMap(list(self.shards))
+        self.placement_ttl = placement_ttl
+        self.max_cached = max_cached
+        self._placements = {}
+        self._user_scoped = {}
+
+    def is_user_scoped(self, query):
+        scoped = self._user_scoped.get(query)
+        if scoped is None:
+            scoped = self._user_scoped[query] = SHARDED_TABLE_PATTERN.search(query) is not None
+        return scoped
+
+    def _lookup(self, user_id):
+        rows = self.directory.execute_query(
+            "SELECT shard, status FROM user_directory WHERE user_id = %s", (user_id,), consistent=True
+        )
+        if rows is None:
+            return None
+        if rows:
+            return rows[0]['shard'], rows[0]['status']
+        return self._place(user_id)
+
+    def _place(self, user_id):
+        """First use of a user: mirror their users row onto the ring's shard and record it"""
+        user = self.directory.execute_query(
+            "SELECT id, username, email, password_hash, created_at FROM users WHERE id = %s", (user_id,), consistent=True
+        )
+        if not user:
+            print(f"Cannot place unknown user {user_id} on a shard")
+            return None
+
+        shard = self.shard_map.shard_for(user_id)
+        user = user[0]
+        mirrored = self.shards[shard].execute_query(
+            "INSERT IGNORE INTO users (id, username, email, password_hash, created_at) VALUES (%s, %s, %s, %s, %s)",
+            (user['id'], user['username'], user['email'], user['password_hash'], user['created_at'])
+        )
+        if mirrored is None:
+            return None
+        self.directory.execute_query(
+            "INSERT IGNORE INTO user_directory (user_id, shard) VALUES (%s, %s)", (user_id, shard)
+        )
+
+        # Another process may have placed the user first; the directory row wins
+        rows = self.directory.execute_query(
+            "SELECT shard, status FROM user_directory WHERE user_id = %s", (user_id,), consistent=True
+        )
+        return (rows[0]['shard'], rows[0]['status']) if rows else None
+
+    def placement(self, user_id):
+        """(shard, status) for a user, from the cache or the directory"""
+        now = time.monotonic()
+        cached = self._placements.get(user_id)
+        if cached is not None and cached[2] > now:
+            return cached[0], cached[1]
+
+        placement = self._lookup(user_id)
+        if placement is None:
+            return None
+        if len(self._placements) >= self.max_cached:
+            self._placements.clear()
+        self._placements[user_id] = (placement[0], placement[1], now + self.placement_ttl)
+        return placement
+
+    def invalidate(self, user_id):
+        self._placements.pop(user_id, None)
+
+    def shard_for_user(self, user_id, write):
+        """The shard database for a user, or None if it cannot take this query right now"""
+        placement = self.placement(user_id)
+        if placement is None:
+            return None
+        shard, status = placement
+        if write and status != 'active':
+            print(f"User {user_id} is being moved between shards; write rejected")
+            return None
+        database = self.shards.get(shard)
+        if database is None:
+            print(f"User {user_id} is placed on unknown shard '{shard}'")
+        return database
+
+    def _route(self, sql, is_read, method, query, params, user_id, consistent):
+        if not self.is_user_scoped(sql):
+            return getattr(self.directory, method)(query, params, user_id=user_id, consistent=consistent)
+        if user_id is None:
+            print(f"Query on a sharded table needs a user_id: {sql[:80]}")
+            return None
+        database = self.shard_for_user(user_id, write=not is_read)
+        if database is None:
+            return None
+        return getattr(database, method)(query, params, user_id=user_id, consistent=consistent)
+
+    def execute_query(self, query, params=None, user_id=None, consistent=False):
+        return self._route(query, self.directory.is_read(query), 'execute_query', query, params, user_id, consistent)
+
+    def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        statement = self.directory.primary.statements.get(name)
+        return self._route(statement.sql, statement.is_read, 'execute_statement', name, params, user_id, consistent)
+
+    def execute_many(self, query, params_list, user_id=None):
+        if not self.is_user_scoped(query):
+            return self.directory.execute_many(query, params_list, user_id=user_id)
+
+        groups = {}
+        for params in params_list:
+            row_user_id = params[0] if user_id is None else user_id
+            groups.setdefault(row_user_id, []).append(params)
+
+        # One batch per shard, keeping the rows of users that cannot be written right now out of it
+        batches = {}
+        skipped = 0
+        for row_user_id, rows in groups.items():
+            database = self.shard_for_user(row_user_id, write=True)
+            if database is None:
+                skipped += len(rows)
+                continue
+            batches.setdefault(id(database), (database, []))[1].extend(rows)
+
+        written = 0
+        for database, rows in batches.values():
+            result = database.execute_many(query, rows)
+            if result is None:
+                skipped += len(rows)
+            else:
+                written += result
+        if skipped:
+            print(f"Sharded batch insert skipped {skipped} rows")
+        return written if written or not skipped else None
+
+    def each_shard(self):
+        return list(self.shards.values())
+
+    def connect(self):
+        for database in self.each_shard():
+            database.connect()
+        return self.directory.connect()
+
+    def disconnect(self):
+        self.directory.disconnect()
+        for database in self.each_shard():
+            database.disconnect()
+
+
+def partitions(db):
+    """The databases a full-table job must scan: every shard when sharded, otherwise db itself"""
+    return db.each_shard() if isinstance(db, ShardedDatabase) else [db]
+
+
+class ShardRebalancer:
+    """
+    Moves a user's rows between shards while the app keeps serving.
+
+    1. Mark the user 'moving' and wait out the app's placement cache, so every
+       process stops writing for them (reads still go to the old shard).
+    2. Copy each per-user table to the new shard and check the row counts.
+    3. Point the directory at the new shard, wait out the cache again, and
+       delete the rows from the old shard.
+
+    Copied rows keep their ids. Shards generate ids in disjoint sequences, so
+    they cannot collide on the target; if one does anyway (ids from before
+    reserve-ids), the copy fails and the user stays where they are. The
+    mirrored users row is left on the old shard, since it may also be the
+    global database.
+    """
+
+    def __init__(self, db, page_size=1000, grace_seconds=1):
+        self.db = db
+        self.page_size = page_size
+        self.settle_seconds = db.placement_ttl + grace_seconds
+
+    def _directory_entry(self, user_id):
+        rows = self.db.directory.execute_query(
+            "SELECT shard, status FROM user_directory WHERE user_id = %s", (user_id,), consistent=True
+        )
+        return rows[0] if rows else None
+
+    def _set_status(self, user_id, shard, status):
+        self.db.directory.execute_query(
+            "UPDATE user_directory SET shard = %s, status = %s WHERE user_id = %s", (shard, status, user_id)
+        )
+
+    def _count(self, database, table, user_id):
+        rows = database.execute_query(f"SELECT COUNT(*) AS total FROM {table} WHERE user_id = %s", (user_id,), consistent=True)
+        return None if rows is None else rows[0]['total']
+
+    def _copy_table(self, source, target, table, user_id):
+        """Copy one table's rows for a user in id-ordered pages; returns the number copied or None"""
+        target.execute_query(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        keyed = table in KEYED_TABLES
+        last_id = 0
+        copied = 0
+        while True:
+            if keyed:
+                rows = source.execute_query(
+                    f"SELECT * FROM {table} WHERE user_id = %s AND id > %s ORDER BY id LIMIT %s",
+                    (user_id, last_id, self.page_size), consistent=True
+                )
+            else:
+                rows = source.execute_query(f"SELECT * FROM {table} WHERE user_id = %s", (user_id,), consistent=True)
+            if rows is None:
+                return None
+            if not rows:
+                return copied
+
+            columns = list(rows[0])
+            query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(['%s'] * len(columns))})")
+            if target.execute_many(query, [tuple(row[column] for column in columns) for row in rows]) is None:
+                return None
+            copied += len(rows)
+
+            if not keyed or len(rows) < self.page_size:
+                return copied
+            last_id = rows[-1]['id']
+
+    def move(self, user_id, target_shard):
+        """Move one user to target_shard; returns a small report, or None if the move failed"""
+        if target_shard not in self.db.shards:
+            print(f"Unknown shard '{target_shard}'")
+            return None
+        self.db.invalidate(user_id)
+        placement = self.db.placement(user_id)
+        if placement is None:
+            return None
+        source_shard, status = placement
+        if source_shard == target_shard:
+            return {'user_id': user_id, 'shard': target_shard, 'moved': 0}
+        if status != 'active':
+            print(f"User {user_id} is already being moved")
+            return None
+
+        source = self.db.shards[source_shard]
+        target = self.db.shards[target_shard]
+        started = time.perf_counter()
+
+        self._set_status(user_id, source_shard, 'moving')
+        entry = self._directory_entry(user_id)
+        if entry is None or entry['status'] != 'moving' or entry['shard'] != source_shard:
+            print(f"Could not mark user {user_id} as moving")
+            return None
+        time.sleep(self.settle_seconds)
+
+        user = self.db.directory.execute_query(
+            "SELECT id, username, email, password_hash, created_at FROM users WHERE id = %s", (user_id,), consistent=True
+        )
+        if user:
+            user = user[0]
+            target.execute_query(
+                "INSERT IGNORE INTO users (id, username, email, password_hash, created_at) VALUES (%s, %s, %s, %s, %s)",
+                (user['id'], user['username'], user['email'], user['password_hash'], user['created_at'])
+            )
+
+        copied = {}
+        for table in SHARDED_TABLES:
+            count = self._copy_table(source, target, table, user_id)
+            if count is None or self._count(target, table, user_id) != self._count(source, table, user_id):
+                print(f"Copying {table} for user {user_id} failed; user stays on {source_shard}")
+                self._set_status(user_id, source_shard, 'active')
+                return None
+            copied[table] = count
+
+        self._set_status(user_id, target_shard, 'active')
+        self.db.invalidate(user_id)
+        time.sleep(self.settle_seconds)
+
+        for table in SHARDED_TABLES:
+            source.execute_query(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+
+        return {
+            'user_id': user_id,
+            'from': source_shard,
+            'to': target_shard,
+            'moved': sum(copied.values()),
+            'tables': copied,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+    def plan(self):
+        """Users whose directory shard differs from the ring's choice, as (user_id, current, target)"""
+        rows = self.db.directory.execute_query(
+            "SELECT user_id, shard FROM user_directory WHERE status = 'active' ORDER BY user_id", consistent=True
+        ) or []
+        moves = []
+        for row in rows:
+            target = self.db.shard_map.shard_for(row['user_id'])
+            if target != row['shard']:
+                moves.append((row['user_id'], row['shard'], target))
+        return moves
+
+    def rebalance(self, limit=None):
+        """Move misplaced users one at a time; returns (moved, failed)"""
+        moved = failed = 0
+        for user_id, _, target in self.plan()[:limit]:
+            report = self.move(user_id, target)
+            if report is None:
+                failed += 1
+            else:
+                moved += 1
+                print(f"Moved user {user_id}: {report}")
+        return moved, failed
+
+    def bootstrap(self, shard):
+        """Record every user without a directory entry as living on `shard` (e.g. an existing single host)"""
+        recorded = self.db.directory.execute_query(
+            "INSERT IGNORE INTO user_directory (user_id, shard) SELECT id, %s FROM users", (shard,)
+        )
+        # The host's ids predate the shard sequences, so no shard may generate them again
+        if recorded is not None and not self.reserve_ids():
+            return None
+        return recorded
+
+    def reserve_ids(self):
+        """Move every shard's AUTO_INCREMENT past the highest id on any shard; returns False on failure"""
+        for table in KEYED_TABLES:
+            highest = 0
+            for database in self.db.each_shard():
+                rows = database.execute_query(f"SELECT MAX(id) AS highest FROM {table}", consistent=True)
+                if rows is None:
+                    return False
+                highest = max(highest, rows[0]['highest'] or 0)
+            for database in self.db.each_shard():
+                if database.execute_query(f"ALTER TABLE {table} AUTO_INCREMENT = {highest + 1}") is None:
+                    return False
+        return True
+
+
+def main():
+    """Shard maintenance tools; uses the app's DB_SHARDS configuration"""
+    from app import background_database
+
+    parser = argparse.ArgumentParser(description="Well Mind shard maintenance")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('plan', help="list users whose shard differs from the ring")
+    move = commands.add_parser('move', help="move one user to a shard")
+    move.add_argument('user_id', type=int)
+    move.add_argument('shard')
+    rebalance = commands.add_parser('rebalance', help="move every misplaced user")
+    rebalance.add_argument('--limit', type=int)
+    bootstrap = commands.add_parser('bootstrap', help="record all existing users on one shard")
+    bootstrap.add_argument('shard')
+    commands.add_parser('reserve-ids', help="start every shard's ids above the current maximum")
+    args = parser.parse_args()
+
+    db = background_database()
+    if not isinstance(db, ShardedDatabase):
+        parser.error("DB_SHARDS is not configured")
+    rebalancer = ShardRebalancer(db)
+
+    if args.command == 'plan':
+        moves = rebalancer.plan()
+        for user_id, current, target in moves:
+            print(f"user {user_id}: {current} -> {target}")
+        print(f"{len(moves)} users to move")
+    elif args.command == 'move':
+        print(rebalancer.move(args.user_id, args.shard))
+    elif args.command == 'rebalance':
+        moved, failed = rebalancer.rebalance(args.limit)
+        print(f"Rebalance complete: {moved} moved, {failed} failed")
+    elif args.command == 'bootstrap':
+        if args.shard not in db.shards:
+            parser.error(f"unknown shard '{args.shard}'")
+        if rebalancer.bootstrap(args.shard) is None:
+            print("Bootstrap failed")
+        else:
+            print(f"Existing users recorded on {args.shard}")
+    elif args.command == 'reserve-ids':
+        print("Ids reserved" if rebalancer.reserve_ids() else "Reserving ids failed")
+
+    db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
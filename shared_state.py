@@ -0,0 +1,235 @@
+import hashlib
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+
+# One table slot: 64-bit key hash and two float values
+SLOT = struct.Struct('=Qdd')
+COUNTER = struct.Struct('=q')
+
+# A worker killed while holding a stripe lock must not wedge the others; after
+# this long callers give up and fail open (request allowed, cache miss)
+LOCK_TIMEOUT = 0.05
+
+
+def key_hash(key):
+    """Stable 64-bit hash of a string key (never 0, which marks an empty slot)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class SharedTable:
+    """
+    Fixed-size, set-associative hash table of (a, b) float pairs in an
+    anonymous shared mapping, so every forked worker sees the same entries.
+    Each key maps to a set of `ways` slots; when a set is full the slot with
+    the smallest b (callers store a timestamp there) is evicted. Sets are
+    guarded by a striped pool of process-shared locks.
+    Must be created in the master before workers fork.
+    """
+
+    def __init__(self, slots=65536, ways=4, stripes=64):
+        self.ways = ways
+        self.sets = max(1, slots // ways)
+        self._buffer = mmap.mmap(-1, self.sets * ways * SLOT.size)
+        context = multiprocessing.get_context('fork')
+        self._locks = [context.Lock() for _ in range(stripes)]
+        self.lock_timeouts = 0
+
+    def _lock_for(self, set_index):
+        return self._locks[set_index % len(self._locks)]
+
+    def _slot_for(self, set_index, key):
+        """Offset of the key's slot (or of the slot to replace) and whether the key was found"""
+        base = set_index * self.ways * SLOT.size
+        empty, oldest, oldest_b = None, None, None
+        for way in range(self.ways):
+            offset = base + way * SLOT.size
+            slot_key, _, b = SLOT.unpack_from(self._buffer, offset)
+            if slot_key == key:
+                return offset, True
+            if slot_key == 0:
+                if empty is None:
+                    empty = offset
+            elif oldest_b is None or b < oldest_b:
+                oldest, oldest_b = offset, b
+        return (empty if empty is not None else oldest), False
+
+    def update(self, key, fn, default=None):
+        """
+        Atomically replace a key's (a, b) with fn(current) where current is the
+        stored pair or None; fn returns (a, b, result) and update returns result.
+        Returns `default` if the set's lock could not be taken in time.
+        """
+        key = key_hash(key)
+        set_index = key % self.sets
+        lock = self._lock_for(set_index)
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            self.lock_timeouts += 1
+            return default
+        try:
+            offset, found = self._slot_for(set_index, key)
+            current = SLOT.unpack_from(self._buffer, offset)[1:] if found else None
+            a, b, result = fn(current)
+            SLOT.pack_into(self._buffer, offset, key, a, b)
+            return result
+        finally:
+            lock.release()
+
+    def get(self, key):
+        """The stored (a, b) pair, or None"""
+        key = key_hash(key)
+        set_index = key % self.sets
+        lock = self._lock_for(set_index)
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            self.lock_timeouts += 1
+            return None
+        try:
+            offset, found = self._slot_for(set_index, key)
+            return SLOT.unpack_from(self._buffer, offset)[1:] if found else None
+        finally:
+            lock.release()
+
+
+class SharedCache:
+    """Float values with a TTL on a SharedTable (e.g. sentiment polarity per message text)"""
+
+    def __init__(self, table, ttl=3600):
+        self.table = table
+        self.ttl = ttl
+
+    def get(self, key):
+        entry = self.table.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl
+        self.table.update(key, lambda current: (value, expires_at, None))
+
+
+class SharedCounters:
+    """Named 64-bit counters in shared memory, summed across every worker on the node"""
+
+    def __init__(self, names):
+        self.index = {name: i for i, name in enumerate(names)}
+        self._buffer = mmap.mmap(-1, max(1, len(names)) * COUNTER.size)
+        self._lock = multiprocessing.get_context('fork').Lock()
+
+    def _offset(self, name):
+        return self.index[name] * COUNTER.size
+
+    def add(self, name, amount=1):
+        offset = self._offset(name)
+        if not self._lock.acquire(timeout=LOCK_TIMEOUT):
+            return
+        try:
+            value = COUNTER.unpack_from(self._buffer, offset)[0] + amount
+            COUNTER.pack_into(self._buffer, offset, value)
+        finally:
+            self._lock.release()
+
+    def get(self, name):
+        return COUNTER.unpack_from(self._buffer, self._offset(name))[0]
+
+    def compare_and_set(self, name, expected, value):
+        """Set a counter to value only if it still holds expected; returns True on success"""
+        offset = self._offset(name)
+        if not self._lock.acquire(timeout=LOCK_TIMEOUT):
+            return False
+        try:
+            if COUNTER.unpack_from(self._buffer, offset)[0] != expected:
+                return False
+            COUNTER.pack_into(self._buffer, offset, value)
+            return True
+        finally:
+            self._lock.release()
+
+    def snapshot(self):
+        return {name: self.get(name) for name in self.index}
+
+
+def next_stamp(current):
+    """A version stamp newer than `current`: epoch milliseconds, bumped past it if the clock is behind"""
+    return max((current or 0) + 1, int(time.time() * 1000))
+
+
+class MemoryVersions:
+    """Per-process version stamps per user, for running without launcher.py"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._stamps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._stamps.get(user_id, 0)
+
+    def bump(self, user_id):
+        """Returns (previous, new) stamps"""
+        with self._lock:
+            previous = self._stamps.pop(user_id, 0)
+            stamp = self._stamps[user_id] = next_stamp(previous)
+            while len(self._stamps) > self.max_entries:
+                self._stamps.popitem(last=False)
+        return previous, stamp
+
+
+class SharedVersions:
+    """
+    Version stamps per user on a SharedTable, so a change saved through one
+    worker (a mood entry, new preferences) makes every worker's cached copy
+    stale. Stamps are stored as (stamp, stamp); an evicted stamp reads as 0 and
+    the next bump restarts from the clock, so it never repeats.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, user_id):
+        entry = self.table.get(str(user_id))
+        return int(entry[0]) if entry else 0
+
+    def bump(self, user_id):
+        def advance(current):
+            previous = int(current[0]) if current else 0
+            stamp = next_stamp(previous)
+            return stamp, stamp, (previous, stamp)
+
+        # If the segment is contended the stamp is left alone; callers treat (None, None) as unknown
+        return self.table.update(str(user_id), advance, default=(None, None))
+
+
+class SharedState:
+    """The node-wide segment set up by launcher.py: rate-limit buckets, hot caches, version stamps and counters"""
+
+    COUNTERS = ('rate_limited', 'shed', 'sentiment_hits', 'sentiment_misses', 'reminder_owner')
+
+    def __init__(self, bucket_slots=65536, cache_slots=16384, sentiment_ttl=3600, version_slots=65536, sticky_seconds=10):
+        self.buckets = SharedTable(bucket_slots)
+        self.sentiment = SharedCache(SharedTable(cache_slots), ttl=sentiment_ttl)
+        self.dashboard_versions = SharedVersions(SharedTable(version_slots))
+        self.preference_versions = SharedVersions(SharedTable(version_slots))
+        # Users who wrote recently, so their reads stay on the primary whichever worker serves them
+        self.recent_writes = SharedCache(SharedTable(version_slots), ttl=sticky_seconds)
+        self.counters = SharedCounters(self.COUNTERS)
+
+
+_current = None
+
+
+def install(state):
+    """Make `state` the node-wide segment; call in the master before the app is imported"""
+    global _current
+    _current = state
+    return state
+
+
+def current_shared_state():
+    """The installed SharedState, or None when the app runs without launcher.py"""
+    return _current
@@ -0,0 +1,95 @@
+import threading
+
+
+PREPARABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class Statement:
+    """A query parsed once at registration, with its own latency and row-count stats"""
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        verb = sql.split(None, 1)[0].upper() if sql.strip() else ''
+        self.is_read = verb in ('SELECT', 'SHOW')
+        self.preparable = verb in PREPARABLE
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow_calls = 0
+
+
+class StatementRegistry:
+    """
+    Named SQL statements shared by every DatabaseManager.
+    Statements are registered once at startup; execute_query() also registers
+    ad-hoc SQL on first use (keyed by the SQL text) so every query is timed.
+    Calls slower than slow_query_ms are logged together with their EXPLAIN plan.
+    """
+
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self._statements = {}
+        self._by_sql = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, sql):
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None:
+                if existing.sql != sql:
+                    raise ValueError(f"Statement '{name}' is already registered with different SQL")
+                return existing
+            statement = Statement(name, sql)
+            self._statements[name] = statement
+            self._by_sql.setdefault(sql, statement)
+            return statement
+
+    def get(self, name):
+        return self._statements[name]
+
+    def for_sql(self, sql):
+        """Statement for ad-hoc SQL, registered under its own text on first use"""
+        statement = self._by_sql.get(sql)
+        if statement is None:
+            statement = self.register(sql, sql)
+        return statement
+
+    def record(self, statement, seconds, rows, failed=False):
+        """Add one call to the statement's stats; returns True if it counts as slow"""
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            statement.calls += 1
+            statement.total_seconds += seconds
+            statement.rows += rows
+            if seconds > statement.max_seconds:
+                statement.max_seconds = seconds
+            if failed:
+                statement.errors += 1
+            if slow:
+                statement.slow_calls += 1
+        return slow
+
+    def stats(self):
+        """Per-statement stats, slowest total time first"""
+        with self._lock:
+            statements = list(self._statements.values())
+        return sorted(
+            (
+                {
+                    'name': statement.name,
+                    'calls': statement.calls,
+                    'errors': statement.errors,
+                    'rows': statement.rows,
+                    'total_ms': round(statement.total_seconds * 1000, 2),
+                    'avg_ms': round(statement.total_seconds * 1000 / statement.calls, 3) if statement.calls else 0,
+                    'max_ms': round(statement.max_seconds * 1000, 2),
+                    'slow_calls': statement.slow_calls
+                }
+                for statement in statements if statement.calls
+            ),
+            key=lambda entry: entry['total_ms'],
+            reverse=True
+        )
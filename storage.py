@@ -0,0 +1,273 @@
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+from mysql.connector import Error as MySQLError
+
+
+class MySQLBackend:
+    """Storage backend for the production MySQL server"""
+
+    name = 'mysql'
+    errors = (MySQLError,)
+    explain_prefix = 'EXPLAIN '
+
+    def __init__(self, config):
+        # Session variables (e.g. a shard's auto_increment_offset) are set on every new connection
+        self.session = config.get('session') or {}
+        self.config = {key: value for key, value in config.items() if key != 'session'}
+
+    def connect(self):
+        connection = mysql.connector.connect(**self.config)
+        if self.session:
+            cursor = connection.cursor()
+            for name, value in self.session.items():
+                cursor.execute(f"SET SESSION {name} = %s", (value,))
+            cursor.close()
+        return connection
+
+    def is_connected(self, connection):
+        return connection is not None and connection.is_connected()
+
+    def cursor(self, connection, dictionary=True):
+        return connection.cursor(dictionary=dictionary)
+
+    def prepared_cursor(self, connection):
+        """Server-side prepared cursor; it stays prepared while it is reused for the same SQL"""
+        return connection.cursor(prepared=True)
+
+    def fetchall(self, cursor):
+        rows = cursor.fetchall()
+        if rows and not isinstance(rows[0], dict):
+            columns = cursor.column_names
+            rows = [dict(zip(columns, row)) for row in rows]
+        return rows
+
+    def translate(self, query):
+        return query
+
+
+def _dict_row(cursor, row):
+    return {column[0]: row[index] for index, column in enumerate(cursor.description)}
+
+
+def _parse_time(value):
+    """SQLite TIME text -> timedelta, matching what mysql.connector returns for TIME columns"""
+    hours, minutes, seconds = (value.decode().split(':') + ['0'])[:3]
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(timedelta, lambda value: str(value))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('TIME', _parse_time)
+
+
+# SQLite equivalents of the tables and indexes in database.DatabaseSetup.create_tables.
+# ENUM columns become TEXT with a CHECK constraint, JSON columns are stored as TEXT and
+# "ON UPDATE CURRENT_TIMESTAMP" is emulated with triggers.
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS idx_username ON users (username)",
+    """
+    CREATE TRIGGER IF NOT EXISTS users_updated_at AFTER UPDATE ON users
+    BEGIN
+        UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mood_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        mood_score INTEGER NOT NULL CHECK (mood_score BETWEEN 1 AND 5),
+        notes TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_mood_user_timestamp ON mood_entries (user_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_mood_timestamp ON mood_entries (timestamp)",
+    """
+    CREATE TABLE IF NOT EXISTS chat_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        message_type TEXT NOT NULL CHECK (message_type IN ('user', 'bot')),
+        content TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sentiment VARCHAR(20) DEFAULT 'neutral'
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_chat_user_timestamp ON chat_sessions (user_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_timestamp ON chat_sessions (timestamp)",
+    """
+    CREATE TABLE IF NOT EXISTS user_preferences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+        notification_enabled BOOLEAN DEFAULT 1,
+        reminder_time TIME DEFAULT '09:00:00',
+        theme VARCHAR(20) DEFAULT 'light',
+        language VARCHAR(10) DEFAULT 'en',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_prefs_updated_at ON user_preferences (updated_at)",
+    """
+    CREATE TRIGGER IF NOT EXISTS user_preferences_updated_at AFTER UPDATE ON user_preferences
+    BEGIN
+        UPDATE user_preferences SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS wellness_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(200) NOT NULL,
+        description TEXT,
+        category TEXT NOT NULL CHECK (category IN ('meditation', 'exercise', 'articles', 'crisis')),
+        content_url VARCHAR(500),
+        content_text TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_category ON wellness_resources (category)",
+    "CREATE INDEX IF NOT EXISTS idx_active ON wellness_resources (is_active)",
+    """
+    CREATE TABLE IF NOT EXISTS user_activity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        activity_type VARCHAR(50) NOT NULL,
+        activity_data JSON CHECK (activity_data IS NULL OR json_valid(activity_data)),
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_user_activity ON user_activity (user_id, activity_type)",
+    "CREATE INDEX IF NOT EXISTS idx_activity_timestamp ON user_activity (timestamp)",
+    """
+    CREATE TABLE IF NOT EXISTS mood_daily_summary (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        day DATE NOT NULL,
+        entries INTEGER NOT NULL,
+        avg_mood REAL NOT NULL,
+        score_1 INTEGER DEFAULT 0,
+        score_2 INTEGER DEFAULT 0,
+        score_3 INTEGER DEFAULT 0,
+        score_4 INTEGER DEFAULT 0,
+        score_5 INTEGER DEFAULT 0,
+        rolling_7_avg REAL,
+        rolling_30_avg REAL,
+        volatility_30 REAL,
+        streak_days INTEGER DEFAULT 0,
+        wow_delta REAL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, day)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_day ON mood_daily_summary (day)",
+    """
+    CREATE TABLE IF NOT EXISTS user_directory (
+        user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+        shard TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'moving')),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_directory_shard ON user_directory (shard)",
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        store_key CHAR(64) PRIMARY KEY,
+        state VARCHAR(20) NOT NULL,
+        fingerprint CHAR(64) NOT NULL,
+        body BLOB,
+        status INTEGER,
+        mimetype VARCHAR(100),
+        expires_at DOUBLE NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys (expires_at)"
+]
+
+
+class SQLiteBackend:
+    """
+    Embedded storage backend for local development, tests and benchmarks.
+    Runs in WAL mode so readers do not block the writer, creates the schema on
+    first connect, and rewrites MySQL-flavoured queries through translate().
+    """
+
+    name = 'sqlite'
+    errors = (sqlite3.Error,)
+    explain_prefix = 'EXPLAIN QUERY PLAN '
+
+    _PLACEHOLDER = re.compile(r'%s')
+    _UPSERT = re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.IGNORECASE)
+    _VALUES_REF = re.compile(r'VALUES\((\w+)\)', re.IGNORECASE)
+    _INSERT_IGNORE = re.compile(r'^\s*INSERT\s+IGNORE\b', re.IGNORECASE)
+
+    def __init__(self, path='wellmind.db'):
+        self.path = path
+        self._translated = {}
+
+    def connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        connection.row_factory = _dict_row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute("PRAGMA busy_timeout=5000")
+        self.create_schema(connection)
+        return connection
+
+    def create_schema(self, connection):
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+
+    def is_connected(self, connection):
+        return connection is not None
+
+    def cursor(self, connection, dictionary=True):
+        return connection.cursor()
+
+    def prepared_cursor(self, connection):
+        # sqlite3 keeps compiled statements in the connection's statement cache
+        return connection.cursor()
+
+    def fetchall(self, cursor):
+        return cursor.fetchall()
+
+    def translate(self, query):
+        """Rewrite %s placeholders, INSERT IGNORE and ON DUPLICATE KEY UPDATE for SQLite (cached per query string)"""
+        translated = self._translated.get(query)
+        if translated is None:
+            translated = self._PLACEHOLDER.sub('?', query)
+            translated = self._INSERT_IGNORE.sub('INSERT OR IGNORE', translated)
+            if self._UPSERT.search(translated):
+                translated = self._UPSERT.sub('ON CONFLICT DO UPDATE SET', translated)
+                translated = self._VALUES_REF.sub(r'excluded.\1', translated)
+            self._translated[query] = translated
+        return translated
+
+
+def create_backend(name, mysql_config=None, sqlite_path='wellmind.db'):
+    """Build the storage backend selected by name ('mysql' or 'sqlite')"""
+    if name == 'sqlite':
+        return SQLiteBackend(sqlite_path)
+    return MySQLBackend(mysql_config)
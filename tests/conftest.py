@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# The app reads its configuration at import time, so point it at a throwaway SQLite file first
+TEST_DIR = tempfile.mkdtemp(prefix='wellmind-tests-')
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(TEST_DIR, 'wellmind.db')
+os.environ['RATE_LIMIT_ENABLED'] = '0'
+os.environ['TRUSTED_PROXY_HOPS'] = '1'
+os.environ['LLM_SIMULATED_LATENCY_MS'] = '1'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as wellmind  # noqa: E402
+from database import SQLiteDatabaseSetup  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    setup = SQLiteDatabaseSetup(os.environ['SQLITE_PATH'])
+    assert setup.setup_database()
+    setup.close_connection()
+    wellmind.app.config['TESTING'] = True
+    return wellmind.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    """A freshly registered user: {'id', 'email', 'password', 'token'}"""
+    name = f"user_{uuid.uuid4().hex[:12]}"
+    account = {'username': name, 'email': f"{name}@example.com", 'password': 'correct horse'}
+    response = client.post('/api/register', json=account)
+    assert response.status_code == 201
+    login = client.post('/api/login', json={'email': account['email'], 'password': account['password']})
+    assert login.status_code == 200
+    return dict(account, id=response.get_json()['user_id'], token=login.get_json()['token'])
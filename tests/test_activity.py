@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from activity import ActivityTracker
+from app import DatabaseManager
+from storage import SQLiteBackend
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / 'activity.db')))
+    manager.connect()
+    manager.execute_query("INSERT INTO users (username, email, password_hash) VALUES ('alice', 'alice@example.com', 'hash')")
+    yield manager
+    manager.disconnect()
+
+
+def wait_for(tracker, total, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = tracker.stats()
+        if stats['written'] + stats['dropped'] >= total:
+            return stats
+        time.sleep(0.01)
+    return tracker.stats()
+
+
+def test_bad_batch_is_counted_and_the_writer_keeps_going(db):
+    tracker = ActivityTracker(db, flush_interval=0.01)
+    tracker.record(1, 'mood_entry', {'not json': object()})
+    assert wait_for(tracker, 1) == {'queued': 0, 'written': 0, 'dropped': 1}
+
+    writer = tracker._writer
+    tracker.record(1, 'chat_message', {'message_length': 12})
+    assert wait_for(tracker, 2) == {'queued': 0, 'written': 1, 'dropped': 1}
+    assert tracker._writer is writer and writer.is_alive()
+    rows = db.execute_query("SELECT activity_type FROM user_activity")
+    assert [row['activity_type'] for row in rows] == ['chat_message']
+
+
+def test_counters_are_exact_under_concurrent_drops(db):
+    tracker = ActivityTracker(db, max_queue_size=1)
+    # A stand-in writer that never drains the queue, so every record() after the first is dropped
+    done = threading.Event()
+    tracker._writer = threading.Thread(target=done.wait, daemon=True)
+    tracker._writer.start()
+    tracker.queue.put_nowait(None)
+
+    def flood():
+        for _ in range(5000):
+            tracker.record(1, 'mood_entry')
+
+    threads = [threading.Thread(target=flood) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    assert tracker.stats()['dropped'] == 40000
@@ -0,0 +1,111 @@
+import math
+import random
+import statistics
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from analytics import CohortAnalytics
+from app import DatabaseManager
+from storage import SQLiteBackend
+
+
+def brute_force(entries):
+    """Per user-day metrics computed the slow, obvious way from (user_id, day, score) tuples"""
+    by_user = {}
+    for user_id, day, score in entries:
+        by_user.setdefault(user_id, {}).setdefault(day, []).append(score)
+
+    expected = {}
+    for user_id, days in by_user.items():
+        def scores_between(first, last):
+            return [score for day, scores in days.items() if first <= day <= last for score in scores]
+
+        for day in days:
+            last_7 = scores_between(day - timedelta(days=6), day)
+            previous_7 = scores_between(day - timedelta(days=13), day - timedelta(days=7))
+            daily_means = [
+                statistics.mean(scores) for logged, scores in days.items()
+                if day - timedelta(days=29) <= logged <= day
+            ]
+            streak = 1
+            while day - timedelta(days=streak) in days:
+                streak += 1
+
+            expected[(user_id, day)] = {
+                'entries': len(days[day]),
+                'avg_mood': statistics.mean(days[day]),
+                'distribution': [days[day].count(score) for score in range(1, 6)],
+                'rolling_7_avg': statistics.mean(last_7),
+                'rolling_30_avg': statistics.mean(scores_between(day - timedelta(days=29), day)),
+                'volatility_30': statistics.pstdev(daily_means),
+                'streak_days': streak,
+                'wow_delta': statistics.mean(last_7) - statistics.mean(previous_7) if previous_7 else math.nan
+            }
+    return expected
+
+
+def random_entries(seed):
+    """Several users with bursts, single days, long gaps and multiple entries per day"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    entries = []
+    for user_id in (1, 2, 3, 7, 1000):
+        day = start + timedelta(days=rng.randrange(5))
+        for _ in range(rng.randrange(1, 60)):
+            for _ in range(rng.choice((1, 1, 1, 2, 3))):
+                entries.append((user_id, day, rng.randint(1, 5)))
+            day += timedelta(days=rng.choice((1, 1, 1, 2, 6, 8, 15, 31)))
+    rng.shuffle(entries)
+    return entries
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compute_matches_brute_force(seed):
+    entries = random_entries(seed)
+    user_ids = np.array([user_id for user_id, _, _ in entries], dtype=np.int64)
+    days = np.array([day for _, day, _ in entries], dtype='datetime64[D]')
+    scores = np.array([score for _, _, score in entries], dtype=np.int64)
+
+    metrics = CohortAnalytics(db=None).compute(user_ids, days, scores)
+    expected = brute_force(entries)
+    assert len(metrics['user_id']) == len(expected)
+
+    for i in range(len(metrics['user_id'])):
+        key = (int(metrics['user_id'][i]), metrics['day'][i].item())
+        want = expected[key]
+        assert metrics['entries'][i] == want['entries'], key
+        assert list(metrics['distribution'][i]) == want['distribution'], key
+        assert metrics['streak_days'][i] == want['streak_days'], key
+        for name in ('avg_mood', 'rolling_7_avg', 'rolling_30_avg', 'wow_delta'):
+            assert metrics[name][i] == pytest.approx(want[name], abs=1e-9, nan_ok=True), (key, name)
+        # Prefix-sum variance loses a little precision, which the square root magnifies near zero;
+        # write_summary stores it rounded to 3 decimals
+        assert metrics['volatility_30'][i] == pytest.approx(want['volatility_30'], abs=1e-5), key
+
+
+def test_run_skips_null_timestamps_and_writes_summary(tmp_path):
+    db = DatabaseManager(backend=SQLiteBackend(str(tmp_path / 'analytics.db')))
+    db.connect()
+    for name in ('alice', 'bob'):
+        db.execute_query("INSERT INTO users (username, email, password_hash) VALUES (%s, %s, 'hash')",
+                         (name, f"{name}@example.com"))
+    rows = [
+        (1, 4, datetime(2024, 5, 1, 9)), (1, 2, datetime(2024, 5, 1, 21)), (1, 5, None),
+        (1, 3, datetime(2024, 5, 2, 8)), (2, 1, None), (2, 5, datetime(2024, 5, 3, 12))
+    ]
+    db.execute_many("INSERT INTO mood_entries (user_id, mood_score, notes, timestamp) VALUES (%s, %s, '', %s)", rows)
+
+    report = CohortAnalytics(db, chunk_size=2).run()
+    assert (report['entries'], report['users'], report['user_days'], report['written']) == (4, 2, 3, 3)
+
+    summary = db.execute_query(
+        "SELECT user_id, day, entries, avg_mood, streak_days FROM mood_daily_summary ORDER BY user_id, day"
+    )
+    assert [tuple(row.values()) for row in summary] == [
+        (1, date(2024, 5, 1), 2, 3.0, 1),
+        (1, date(2024, 5, 2), 1, 3.0, 2),
+        (2, date(2024, 5, 3), 1, 5.0, 1)
+    ]
+    db.disconnect()
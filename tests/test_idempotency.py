@@ -0,0 +1,55 @@
+import uuid
+
+import pytest
+
+import app as wellmind
+from idempotency import IdempotencyStore, MemoryIdempotencyBackend, RedisIdempotencyBackend
+
+
+def test_default_backend_is_in_memory():
+    assert isinstance(wellmind.idempotency.backend, MemoryIdempotencyBackend)
+
+
+def test_replay_does_not_touch_the_database(client, user, monkeypatch):
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+    payload = {'user_id': user['id'], 'message': 'I feel a bit stressed'}
+    first = client.post('/api/chat', json=payload, headers=headers)
+    assert first.status_code == 200
+
+    def unreachable(*args, **kwargs):
+        raise AssertionError("replay reached the database")
+
+    for method in ('execute_query', 'execute_statement', 'execute_many'):
+        monkeypatch.setattr(wellmind.db, method, unreachable)
+    monkeypatch.setattr(wellmind.ai_therapist, 'generate_response', unreachable)
+
+    replay = client.post('/api/chat', json=payload, headers=headers)
+    assert replay.status_code == 200
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json() == first.get_json()
+
+
+def test_memory_backend_is_bounded():
+    backend = MemoryIdempotencyBackend(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        assert backend.add(key, ('in_progress', key), ttl=60)
+    assert backend.get('a') is None
+    assert backend.get('c') == ('in_progress', 'c')
+    assert not backend.add('c', ('in_progress', 'other'), ttl=60)
+
+
+def test_redis_backend_round_trip():
+    fakeredis = pytest.importorskip('fakeredis')
+    store = IdempotencyStore(RedisIdempotencyBackend(client=fakeredis.FakeRedis()))
+
+    store_key, fingerprint, outcome = store.begin('/api/mood', 'k1', b'{"mood_score": 3}')
+    assert outcome is None
+    assert store.begin('/api/mood', 'k1', b'{"mood_score": 3}')[2] == (409, 'A request with this Idempotency-Key is still in progress')
+
+    store.finish(store_key, fingerprint, b'{"mood_id": 7}\n', 201, 'application/json')
+    assert store.begin('/api/mood', 'k1', b'{"mood_score": 3}')[2] == (b'{"mood_id": 7}\n', 201, 'application/json')
+    assert store.begin('/api/mood', 'k1', b'{"mood_score": 4}')[2][0] == 422
+
+    store_key, fingerprint, _ = store.begin('/api/mood', 'k2', b'{}')
+    store.finish(store_key, fingerprint, b'oops', 500, 'application/json')
+    assert store.begin('/api/mood', 'k2', b'{}')[2] is None
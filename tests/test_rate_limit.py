@@ -0,0 +1,55 @@
+import pytest
+
+import app as wellmind
+from rate_limit import MemoryBucketBackend, RateLimiter, queue_wait_from
+
+
+@pytest.fixture
+def limited(app, monkeypatch):
+    """Turn on the app's rate limiter with a tiny default quota: a burst of 2, then effectively nothing"""
+    monkeypatch.setattr(wellmind.rate_limiter, 'enabled', True)
+    monkeypatch.setattr(wellmind.rate_limiter, 'backend', MemoryBucketBackend())
+    monkeypatch.setattr(wellmind.rate_limiter, 'quotas', {None: {'ip': (0.001, 2)}})
+    return app.test_client()
+
+
+def statuses(client, count, **kwargs):
+    return [client.get('/api/resources', environ_base={'REMOTE_ADDR': '10.0.0.2'}, **kwargs).status_code
+            for _ in range(count)]
+
+
+def test_clients_behind_one_proxy_get_separate_buckets(limited):
+    alice = {'X-Forwarded-For': '203.0.113.7'}
+    bob = {'X-Forwarded-For': '198.51.100.23'}
+    assert statuses(limited, 3, headers=alice) == [200, 200, 429]
+    assert statuses(limited, 2, headers=bob) == [200, 200]
+
+
+def test_only_the_trusted_hop_is_used(limited):
+    # The client can prepend anything; only the entry added by the trusted proxy counts
+    assert statuses(limited, 2, headers={'X-Forwarded-For': '1.1.1.1, 203.0.113.7'}) == [200, 200]
+    assert statuses(limited, 1, headers={'X-Forwarded-For': '2.2.2.2, 203.0.113.7'}) == [429]
+
+
+def test_direct_requests_use_the_socket_address(limited):
+    assert statuses(limited, 3) == [200, 200, 429]
+
+
+def test_check_rejects_over_quota_and_releases():
+    limiter = RateLimiter(quotas={None: {'ip': (0.001, 1)}})
+    assert limiter.check('/api/mood', '10.0.0.1', lambda: None) is None
+    limiter.release()
+    status, _, retry_after = limiter.check('/api/mood', '10.0.0.1', lambda: None)
+    assert status == 429 and retry_after > 0
+    assert limiter.check('/api/mood', '10.0.0.9', lambda: None) is None
+    limiter.release()
+    assert limiter.shedder.in_flight == 0
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None), ('t=1700000000.5', 1.5), ('t=1700000000500', 1.5), ('t=1700000000500000', 1.5),
+    ('t=1600000000', None), ('garbage', None)
+])
+def test_queue_wait_from(header, expected):
+    wait = queue_wait_from(header, now=1700000002.0)
+    assert wait == (None if expected is None else pytest.approx(expected))
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import DatabaseManager
+from reminders import MINUTES_PER_DAY, ReminderScheduler, to_minute_of_day
+from storage import SQLiteBackend
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+
+    def send(self, user_ids, due_at):
+        self.batches.append((due_at, sorted(user_ids)))
+        return True
+
+    def sent(self):
+        return sorted(user_id for _, user_ids in self.batches for user_id in user_ids)
+
+
+class Clock:
+    """Drives tick() with a wall-clock reading and a monotonic time that only moves forward"""
+
+    def __init__(self, scheduler, start=0.0):
+        self.scheduler = scheduler
+        self.monotonic = start
+
+    def tick(self, wall, advance=15):
+        self.monotonic += advance
+        return self.scheduler.tick(now=wall, monotonic_now=self.monotonic)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = ReminderScheduler(db=None, sink=ListSink(), batch_size=2)
+    # One user due at every 15th minute of the day: user 100 + minute
+    for minute in range(0, MINUTES_PER_DAY, 15):
+        scheduler.update_preference(100 + minute, True, f"{minute // 60:02d}:{minute % 60:02d}")
+    return scheduler
+
+
+def at(hour, minute, second=0, day=1):
+    return datetime(2024, 11, day, hour, minute, second)
+
+
+@pytest.mark.parametrize('value, minute', [
+    (timedelta(hours=9, minutes=30), 570), ('21:45', 1305), ('07:05:30', 425), (at(23, 59).time(), 1439)
+])
+def test_to_minute_of_day(value, minute):
+    assert to_minute_of_day(value) == minute
+
+
+def test_each_bucket_is_sent_once_as_time_passes(scheduler):
+    clock = Clock(scheduler)
+    assert clock.tick(at(8, 59, 50)) == 0
+    assert clock.tick(at(9, 0, 5)) == 1
+    assert clock.tick(at(9, 0, 20)) == 0
+    for second in range(35, 60 * 16, 15):
+        clock.tick(at(9, 0) + timedelta(seconds=second))
+    assert scheduler.sink.sent() == [100 + 540, 100 + 555]
+    assert [due_at for due_at, _ in scheduler.sink.batches] == [at(9, 0), at(9, 15)]
+
+
+def test_wraps_past_midnight(scheduler):
+    clock = Clock(scheduler)
+    clock.tick(at(23, 59, 50))
+    assert clock.tick(at(0, 0, 5, day=2)) == 1
+    assert scheduler.sink.batches == [(at(0, 0, day=2), [100])]
+
+
+def test_a_stalled_tick_catches_up_the_minutes_that_passed(scheduler):
+    clock = Clock(scheduler)
+    clock.tick(at(9, 59, 55))
+    assert clock.tick(at(10, 31, 0), advance=31 * 60) == 3
+    assert scheduler.sink.sent() == [100 + 600, 100 + 615, 100 + 630]
+
+
+def test_small_backward_step_sends_nothing(scheduler):
+    scheduler.update_preference(1, True, '01:58')
+    scheduler.update_preference(2, True, '01:59')
+    clock = Clock(scheduler)
+    clock.tick(at(1, 59, 30))
+    clock.tick(at(1, 59, 45))
+    assert clock.tick(at(1, 58, 59)) == 0
+    assert clock.tick(at(1, 59, 14)) == 0
+    assert clock.tick(at(2, 0, 10)) == 1
+    # 01:59 went out once on the first tick; 01:58 and the rest of the day never did
+    assert scheduler.sink.sent() == [2, 100 + 120]
+
+
+def test_dst_fall_back_does_not_repeat_the_hour(scheduler):
+    clock = Clock(scheduler)
+    clock.tick(at(1, 59, 50))
+    # 02:00 becomes 01:00 again; the hour repeats on the wall clock only
+    wall = at(1, 0, 5)
+    for _ in range(4 * 61):
+        clock.tick(wall)
+        wall += timedelta(seconds=15)
+    assert scheduler.sink.sent() == [100 + 120]
+
+
+def test_forward_step_sends_the_skipped_buckets(scheduler):
+    clock = Clock(scheduler)
+    clock.tick(at(1, 59, 50))
+    # DST spring-forward: 02:00 becomes 03:00, so the 02:xx reminders are due now
+    assert clock.tick(at(3, 0, 5)) == 5
+    assert scheduler.sink.sent() == [100 + minute for minute in range(120, 181, 15)]
+
+
+def test_update_preference_moves_and_removes_users():
+    scheduler = ReminderScheduler(db=None, sink=ListSink())
+    scheduler.update_preference(1, True, '09:00')
+    scheduler.update_preference(1, True, '10:30')
+    scheduler.update_preference(2, True, '10:30')
+    scheduler.update_preference(2, False, '10:30')
+    assert scheduler.wheel[540] == set()
+    assert scheduler.wheel[630] == {1}
+    assert scheduler.stats()['scheduled_users'] == 1
+
+
+def test_load_and_sync_from_user_preferences(tmp_path):
+    db = DatabaseManager(backend=SQLiteBackend(str(tmp_path / 'reminders.db')))
+    db.connect()
+    for user_id in (1, 2, 3):
+        db.execute_query("INSERT INTO users (username, email, password_hash) VALUES (%s, %s, 'hash')",
+                         (f"user{user_id}", f"user{user_id}@example.com"))
+    upsert = 'upsert_preferences'
+    db.execute_statement(upsert, (1, True, '08:00', 'light', 'en'))
+    db.execute_statement(upsert, (2, False, '08:00', 'light', 'en'))
+
+    scheduler = ReminderScheduler(db, ListSink())
+    assert scheduler.load() == 1
+    assert scheduler.wheel[480] == {1}
+
+    # Saved by another process: the scheduler only learns about it from updated_at
+    db.execute_statement(upsert, (2, True, '08:00', 'light', 'en'))
+    db.execute_statement(upsert, (3, True, '21:15', 'dark', 'en'))
+    assert scheduler.sync() >= 2
+    assert scheduler.wheel[480] == {1, 2}
+    assert scheduler.wheel[1275] == {3}
+    db.disconnect()
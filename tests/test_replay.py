@@ -0,0 +1,53 @@
+import asyncio
+import random
+
+from aiohttp import web
+
+from bench_serving import percentile
+from replay import Histogram, build_report, replay
+
+
+def test_histogram_percentiles_are_within_one_percent():
+    rng = random.Random(7)
+    values = [rng.expovariate(20) for _ in range(20000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.add(value)
+
+    exact = sorted(values)
+    for fraction in (0.5, 0.95, 0.99):
+        assert abs(histogram.percentile(fraction) - percentile(exact, fraction)) <= 0.01 * percentile(exact, fraction)
+    assert histogram.percentile(1.0) == histogram.max == exact[-1]
+    assert len(histogram.buckets) < 2000
+
+
+def test_replay_mixes_records_with_and_without_timestamps():
+    async def run():
+        async def handler(request):
+            return web.json_response({'path': request.path}, status=201 if request.method == 'POST' else 200)
+
+        server = web.Application()
+        server.router.add_route('*', '/{tail:.*}', handler)
+        runner = web.AppRunner(server)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        capture = [
+            (1718000000.0, {'method': 'GET', 'path': '/api/mood/1'}),
+            (None, {'method': 'GET', 'path': '/api/mood/2'}),
+            (1718000000.05, {'method': 'POST', 'path': '/api/mood', 'body': {'mood_score': 3}, 'status': 201}),
+            (None, {'method': 'GET', 'path': '/api/analytics/1', 'status': 404}),
+        ]
+        try:
+            return await replay(f"http://127.0.0.1:{port}", iter(capture), 1.0, 10, 10, None)
+        finally:
+            await runner.cleanup()
+
+    routes, elapsed, lag = asyncio.run(run())
+    report = build_report(routes, elapsed, lag, skipped=0)
+    assert report['total']['requests'] == 4
+    assert report['total']['failures'] == 1
+    assert report['routes']['GET /api/mood/<id>']['requests'] == 2
+    assert lag.count == 2
@@ -0,0 +1,91 @@
+import asyncio
+
+from async_storage import AsyncReplicatedDatabase
+from replication import ReplicatedDatabase
+from statements import StatementRegistry
+
+
+class FakeServer:
+    """Synchronous stand-in for a DatabaseManager that reports a replica lag and records queries"""
+
+    def __init__(self, name, statements, lag=0):
+        self.name = name
+        self.statements = statements
+        self.lag = lag
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        if query.startswith('SHOW'):
+            return [{'Seconds_Behind_Source': self.lag}] if self.lag is not None else None
+        self.queries.append(query)
+        return [{'server': self.name}]
+
+    def execute_statement(self, name, params=None):
+        self.queries.append(name)
+        return [{'server': self.name}] if self.statements.get(name).is_read else 1
+
+
+class FakePool:
+    """Async stand-in for AioMySQLDatabase; `failing` makes every query return None like a dropped connection"""
+
+    def __init__(self, name, statements, failing=False):
+        self.name = name
+        self.statements = statements
+        self.failing = failing
+        self.queries = []
+
+    async def execute_statement(self, name, params=None, user_id=None, consistent=False):
+        self.queries.append(name)
+        if self.failing:
+            return None
+        return [{'server': self.name}] if self.statements.get(name).is_read else 1
+
+    async def execute_query(self, query, params=None, user_id=None, consistent=False):
+        self.queries.append(query)
+        return None if self.failing else [{'server': self.name}]
+
+
+def build(failing_replica=False):
+    statements = StatementRegistry()
+    statements.register('read_moods', "SELECT mood_score FROM mood_entries WHERE user_id = %s")
+    statements.register('save_mood', "INSERT INTO mood_entries (user_id, mood_score) VALUES (%s, %s)")
+    routing = ReplicatedDatabase(FakeServer('primary', statements), [FakeServer('replica', statements)])
+    adb = AsyncReplicatedDatabase(
+        routing, FakePool('primary', statements), [FakePool('replica', statements, failing=failing_replica)]
+    )
+    return routing, adb
+
+
+def test_async_reads_use_the_replica():
+    routing, adb = build()
+    rows = asyncio.run(adb.execute_statement('read_moods', (1,), user_id=1))
+    assert rows == [{'server': 'replica'}]
+    assert asyncio.run(adb.execute_statement('read_moods', (1,), user_id=1, consistent=True)) == [{'server': 'primary'}]
+
+
+def test_async_write_makes_both_serving_modes_sticky():
+    routing, adb = build()
+    assert asyncio.run(adb.execute_statement('save_mood', (1, 4), user_id=1)) == 1
+    assert adb.primary.queries == ['save_mood']
+
+    # The user's own reads stay on the primary, in the async routes and in the Flask routes
+    assert asyncio.run(adb.execute_statement('read_moods', (1,), user_id=1)) == [{'server': 'primary'}]
+    assert routing.execute_statement('read_moods', (1,), user_id=1) == [{'server': 'primary'}]
+    # Other users still read from the replica
+    assert asyncio.run(adb.execute_statement('read_moods', (2,), user_id=2)) == [{'server': 'replica'}]
+
+
+def test_failed_replica_read_falls_back_and_leaves_rotation():
+    routing, adb = build(failing_replica=True)
+    assert asyncio.run(adb.execute_statement('read_moods', (1,), user_id=1)) == [{'server': 'primary'}]
+    assert adb.replicas[0].queries == ['read_moods']
+
+    assert asyncio.run(adb.execute_statement('read_moods', (2,), user_id=2)) == [{'server': 'primary'}]
+    assert adb.replicas[0].queries == ['read_moods']
+
+
+def test_lagging_replica_is_skipped():
+    statements = StatementRegistry()
+    statements.register('read_moods', "SELECT mood_score FROM mood_entries WHERE user_id = %s")
+    routing = ReplicatedDatabase(FakeServer('primary', statements), [FakeServer('replica', statements, lag=30)])
+    assert routing.execute_statement('read_moods', (1,), user_id=1) == [{'server': 'primary'}]
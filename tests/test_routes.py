@@ -0,0 +1,136 @@
+import gzip
+import threading
+import uuid
+
+import app as wellmind
+
+
+def test_register_validates_and_rejects_duplicates(client, user):
+    assert client.post('/api/register', json={'username': 'x'}).status_code == 400
+
+    duplicate = client.post('/api/register', json={
+        'username': user['username'], 'email': user['email'], 'password': 'other'
+    })
+    assert duplicate.status_code == 409
+
+
+def test_login(client, user):
+    response = client.post('/api/login', json={'email': user['email'], 'password': user['password']})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['user'] == {'id': user['id'], 'username': user['username'], 'email': user['email']}
+    assert body['token']
+
+    wrong = client.post('/api/login', json={'email': user['email'], 'password': 'wrong'})
+    assert wrong.status_code == 401
+    assert client.post('/api/login', json={'email': user['email']}).status_code == 400
+
+
+def test_mood_round_trip(client, user):
+    assert client.post('/api/mood', json={'user_id': user['id'], 'mood_score': 9}).status_code == 400
+
+    for score in (2, 4):
+        response = client.post('/api/mood', json={'user_id': user['id'], 'mood_score': score, 'notes': f"score {score}"})
+        assert response.status_code == 201
+        assert response.get_json()['mood_id']
+
+    entries = client.get(f"/api/mood/{user['id']}").get_json()['mood_entries']
+    assert [(entry['mood_score'], entry['notes']) for entry in entries] == [(2, 'score 2'), (4, 'score 4')]
+
+    analytics = client.get(f"/api/analytics/{user['id']}").get_json()
+    assert analytics['avg_mood_30_days'] == 3.0
+    assert analytics['total_entries'] == 2
+    assert analytics['mood_trend']['last_week'] == 3.0
+
+
+def test_idempotent_mood_retry_is_stored_once(client, user):
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+    payload = {'user_id': user['id'], 'mood_score': 3}
+    first = client.post('/api/mood', json=payload, headers=headers)
+    retry = client.post('/api/mood', json=payload, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert first.get_json() == retry.get_json()
+
+    changed = client.post('/api/mood', json=dict(payload, mood_score=5), headers=headers)
+    assert changed.status_code == 422
+    assert len(client.get(f"/api/mood/{user['id']}").get_json()['mood_entries']) == 1
+
+
+def test_dashboard_etag(client, user):
+    client.post('/api/mood', json={'user_id': user['id'], 'mood_score': 5, 'notes': 'great'})
+    response = client.get(f"/api/dashboard/{user['id']}")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['analytics']['total_entries'] == 1
+    assert [entry['notes'] for entry in body['mood_entries']] == ['great']
+
+    etag = response.headers['ETag']
+    assert client.get(f"/api/dashboard/{user['id']}", headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/mood', json={'user_id': user['id'], 'mood_score': 1})
+    changed = client.get(f"/api/dashboard/{user['id']}", headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['analytics']['total_entries'] == 2
+
+
+def test_chat_replies_and_keeps_history(client, user):
+    assert client.post('/api/chat', json={'user_id': user['id']}).status_code == 400
+
+    response = client.post('/api/chat', json={'user_id': user['id'], 'message': 'I feel anxious today'})
+    assert response.status_code == 200
+    assert response.get_json()['response']
+
+    rows = wellmind.db.execute_statement('recent_chat_messages', (user['id'],), user_id=user['id'], consistent=True)
+    assert sorted(row['message_type'] for row in rows) == ['bot', 'user']
+
+
+def test_preferences(client, user):
+    bad = client.post('/api/preferences', json={'user_id': user['id'], 'reminder_time': '9am'})
+    assert bad.status_code == 400
+
+    saved = client.post('/api/preferences', json={'user_id': user['id'], 'reminder_time': '20:15', 'language': 'es'})
+    assert saved.status_code == 200
+    assert wellmind.user_languages.lookup(user['id']) == 'es'
+
+
+def test_resources(client):
+    response = client.get('/api/resources', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == f'public, max-age={wellmind.resource_catalog.ttl}'
+    body = response.data
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    assert b'"resources"' in body
+
+    crisis = client.get('/api/resources?category=crisis').get_json()['resources']
+    assert crisis and {resource['category'] for resource in crisis} == {'crisis'}
+    assert client.get('/api/resources?category=unknown').status_code == 404
+
+    etag = response.headers['ETag']
+    assert client.get('/api/resources', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_concurrent_requests(app, user):
+    """Parallel requests share the module-level DatabaseManager; none may fail or lose a write"""
+    failures = []
+
+    def work():
+        client = app.test_client()
+        for _ in range(20):
+            saved = client.post('/api/mood', json={'user_id': user['id'], 'mood_score': 3})
+            history = client.get(f"/api/mood/{user['id']}")
+            analytics = client.get(f"/api/analytics/{user['id']}")
+            failures.extend(
+                response.status_code for response, expected in ((saved, 201), (history, 200), (analytics, 200))
+                if response.status_code != expected
+            )
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+    analytics = app.test_client().get(f"/api/analytics/{user['id']}").get_json()
+    assert analytics['total_entries'] == 160
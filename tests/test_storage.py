@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import DatabaseManager
+from storage import SQLITE_SCHEMA, SQLiteBackend
+
+
+TABLES = (
+    'users', 'mood_entries', 'chat_sessions', 'user_preferences', 'wellness_resources',
+    'user_activity', 'mood_daily_summary', 'user_directory', 'idempotency_keys'
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / 'storage.db')))
+    manager.connect()
+    for name in ('alice', 'bob'):
+        manager.execute_query(
+            "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
+            (name, f"{name}@example.com", 'hash')
+        )
+    yield manager
+    manager.disconnect()
+
+
+def test_schema_has_every_table_and_index(db):
+    tables = {row['name'] for row in db.execute_query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert set(TABLES) <= tables
+
+    indexes = {row['name'] for row in db.execute_query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    declared = {statement.split()[5] for statement in SQLITE_SCHEMA if statement.startswith('CREATE INDEX')}
+    assert declared <= indexes
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT * FROM users WHERE id = %s AND email = %s", "SELECT * FROM users WHERE id = ? AND email = ?"),
+    ("INSERT IGNORE INTO user_directory (user_id, shard) VALUES (%s, %s)",
+     "INSERT OR IGNORE INTO user_directory (user_id, shard) VALUES (?, ?)"),
+    ("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = VALUES(b)",
+     "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = excluded.b"),
+])
+def test_translate(query, expected):
+    assert SQLiteBackend().translate(query) == expected
+
+
+def test_upsert_preferences_inserts_then_updates(db):
+    db.execute_statement('upsert_preferences', (1, True, '09:00', 'light', 'en'))
+    db.execute_statement('upsert_preferences', (1, False, '21:30', 'dark', 'es'))
+
+    rows = db.execute_query("SELECT * FROM user_preferences WHERE user_id = %s", (1,))
+    assert len(rows) == 1
+    assert rows[0]['notification_enabled'] == 0
+    assert rows[0]['reminder_time'] == timedelta(hours=21, minutes=30)
+    assert (rows[0]['theme'], rows[0]['language']) == ('dark', 'es')
+
+
+def test_insert_ignore_skips_duplicates(db):
+    query = "INSERT IGNORE INTO user_directory (user_id, shard) VALUES (%s, %s)"
+    assert db.execute_many(query, [(1, 'shard0'), (2, 'shard0')]) == 2
+    assert db.execute_many(query, [(1, 'shard1'), (2, 'shard1')]) == 0
+
+    rows = db.execute_query("SELECT shard FROM user_directory ORDER BY user_id")
+    assert [row['shard'] for row in rows] == ['shard0', 'shard0']
+
+
+def test_timestamps_round_trip(db):
+    moment = datetime(2024, 3, 1, 8, 30, 15)
+    mood_id = db.execute_statement('insert_mood_entry', (1, 4, 'fine', moment))
+    assert mood_id
+
+    rows = db.execute_statement('mood_history', (1, moment - timedelta(days=1)))
+    assert rows == [{'mood_score': 4, 'notes': 'fine', 'timestamp': moment}]
+
+
+def test_failed_query_returns_none(db):
+    assert db.execute_query("SELECT * FROM no_such_table") is None
+    assert db.execute_query("SELECT COUNT(*) AS total FROM users") == [{'total': 2}]
+
+
+def test_concurrent_threads_never_share_a_cursor(db):
+    """Every thread runs the same named statements at once and must only ever see its own rows"""
+    since = datetime.now() - timedelta(days=1)
+    errors = []
+
+    def work(user_id, notes):
+        try:
+            for index in range(100):
+                if not db.execute_statement('insert_mood_entry', (user_id, 3, notes, datetime.now())):
+                    errors.append(f"insert {notes} #{index} failed")
+                rows = db.execute_statement('mood_history', (user_id, since))
+                if rows is None or len(rows) != index + 1 or {row['notes'] for row in rows} != {notes}:
+                    errors.append(f"{notes} read {rows and len(rows)} rows at #{index}")
+                    return
+        except Exception as e:
+            errors.append(repr(e))
+
+    def read_stats():
+        for _ in range(200):
+            if db.execute_statement('mood_stats_since', (1, since)) is None:
+                errors.append("mood_stats_since failed")
+
+    threads = [threading.Thread(target=work, args=(1, 'alice')), threading.Thread(target=work, args=(2, 'bob'))]
+    threads += [threading.Thread(target=read_stats) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.execute_query("SELECT COUNT(*) AS total FROM mood_entries") == [{'total': 200}]
+
+
+def test_disconnect_closes_every_threads_connection(db):
+    opened = []
+    connect = db.backend.connect
+
+    def tracking_connect():
+        opened.append(connect())
+        return opened[-1]
+
+    db.backend.connect = tracking_connect
+    ready, release = threading.Barrier(5), threading.Event()
+
+    def work():
+        db.execute_query("SELECT COUNT(*) AS total FROM users")
+        ready.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    db.disconnect()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(opened) == 4
+    for connection in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    # The next query reconnects
+    assert db.execute_query("SELECT COUNT(*) AS total FROM users") == [{'total': 2}]